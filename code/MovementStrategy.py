@@ -1,6 +1,10 @@
 # STRATEGY PATTERN
 import random
-import heapq  # For priority queue
+import weakref
+from array import array
+from functools import partial
+from hpa import PENDING, SETTLE_PER_QUERY, get_goal_field, uses_hierarchy
+from plan_scheduler import get_plan_scheduler
 
 class MovementStrategy:
     def move(self, ghost, maze, player):
@@ -17,8 +21,8 @@ class RandomMovement(MovementStrategy):
         ghost.timer_counter += 1
         if ghost.timer_counter >= ghost.direction_timer:
             # Change direction after the timer expires
-            ghost.current_direction = random.choice(["x", "y"])
-            ghost.current_step = random.choice([-ghost.speed, ghost.speed])
+            ghost.current_direction = ghost.rng.movement.choice(["x", "y"])
+            ghost.current_step = ghost.rng.movement.choice([-ghost.speed, ghost.speed])
             ghost.timer_counter = 0
 
         if ghost.current_direction == "x":
@@ -33,16 +37,20 @@ class RandomMovement(MovementStrategy):
                 ghost.timer_counter = ghost.direction_timer  # Force direction change
 
 class ScaredMovement(MovementStrategy):
-    def __init__(self):
+    def __init__(self, horizon=8):
         self.path = []  # List of (x, y) grid positions to follow
         self.target_cell = None  # The current target cell on the path
+        self.horizon = horizon  # Maximum number of steps the flee search looks ahead
 
     def move(self, ghost, maze, player):
-        # Recalculate the path if necessary
+        # Recalculate the path if necessary; the scheduler may only run the search on a later
+        # tick, and the ghost keeps following its current path until then
         ghost.timer_counter += 1
-        if ghost.timer_counter >= ghost.direction_timer or not self.path:
-            self.path = self._calculate_path(ghost, player, maze)
-            ghost.timer_counter = 0  # Reset the timer
+        scheduler = get_plan_scheduler(maze)
+        self._adopt_path(ghost, maze, scheduler.result(self))
+        if (ghost.timer_counter >= ghost.direction_timer or not self.path) and not scheduler.waiting(self):
+            scheduler.submit(self, self._path_search(ghost, player, maze))
+            self._adopt_path(ghost, maze, scheduler.result(self))
 
         # Follow the path if it exists
         if self.path:
@@ -52,6 +60,21 @@ class ScaredMovement(MovementStrategy):
             # Move toward the target cell
             self._move_toward_target(ghost)
 
+    def _adopt_path(self, ghost, maze, planned):
+        """Switch to a planned (start cell, path) if it still fits where the ghost is now."""
+        if planned is None:
+            return
+        start, path = planned
+        cell = (ghost.rect.centerx // maze.cell_size, ghost.rect.centery // maze.cell_size)
+        if cell != start:
+            # The ghost moved on while the search waited; resume from its cell if the path passes it
+            centre = (cell[0] * maze.cell_size + maze.cell_size // 2, cell[1] * maze.cell_size + maze.cell_size // 2)
+            if centre not in path:
+                return
+            path = path[path.index(centre) + 1:]
+        self.path = path
+        ghost.timer_counter = 0  # Reset the timer
+
     def _move_toward_target(self, ghost):
         """Move the ghost toward the target cell."""
         target_x, target_y = self.target_cell
@@ -77,81 +100,260 @@ class ScaredMovement(MovementStrategy):
             self.target_cell = None if not self.path else self.path.pop(0)
 
     def _calculate_path(self, ghost, player, maze):
-        """A* algorithm to find the path away from the player."""
-        start = (ghost.rect.centerx // maze.cell_size, ghost.rect.centery // maze.cell_size)
-        goal = (player.rect.centerx // maze.cell_size, player.rect.centery // maze.cell_size)
-
-        # Priority queue for A*
-        open_set = []
-        heapq.heappush(open_set, (0, start))  # (priority, cell)
-
-        came_from = {}  # Track the best path
-        g_score = {start: 0}  # Cost from start to the current cell
-        f_score = {start: -self._heuristic(start, goal)}  # Use negative heuristic for moving away
-
-        while open_set:
-            _, current = heapq.heappop(open_set)
-
-            # Check neighbors
-            for neighbor in self._get_neighbors(current, maze):
-                tentative_g_score = g_score[current] + 1  # Distance is always 1 in a grid
-
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    # Update path if this route is better
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] - self._heuristic(neighbor, goal)  # Negative heuristic
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-
-        # Reconstruct the path
-        return self._reconstruct_path(came_from, current, maze.cell_size)
-
-    def _heuristic(self, cell, goal):
-        """Heuristic function for A* (negative Manhattan distance)."""
-        return -1 * (abs(cell[0] - goal[0]) + abs(cell[1] - goal[1]))
-
-    def _get_neighbors(self, cell, maze):
-        """Get walkable neighbors of a cell."""
-        x, y = cell
-        neighbors = []
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Left, Right, Up, Down
-            nx, ny = x + dx, y + dy
-            if 0 <= ny < len(maze.layout) and 0 <= nx < len(maze.layout[ny]) and maze.layout[ny][nx] != 1:
-                neighbors.append((nx, ny))
-        return neighbors
-
-    def _reconstruct_path(self, came_from, current, cell_size):
+        """
+        Plan a short escape route: search at most `horizon` steps around the ghost and head
+        for the reachable cell with the best escape score.
+        """
+        return self._path_search(ghost, player, maze)()[1]
+
+    def _path_search(self, ghost, player, maze):
+        """
+        The escape route search for the ghost's and player's current cells, as a callable
+        returning (start cell, path). It only reads data that is never changed in place, so it
+        can run on a later tick or on the scheduler's worker thread.
+        """
+        grid = maze.grid
+        player_cell = (player.rect.centerx // maze.cell_size, player.rect.centery // maze.cell_size)
+        if uses_hierarchy(maze):
+            # A full distance field is too costly to rebuild on arena mazes; within the short
+            # horizon the straight grid distance to the player is a good enough stand-in
+            distances = GridDistances(grid, player_cell)
+        else:
+            field = get_distance_field(maze)
+            field.update(player_cell)
+            distances = field.distances
+        safety = get_safety_map(maze)
+        cell = (ghost.rect.centerx // maze.cell_size, ghost.rect.centery // maze.cell_size)
+        return partial(self._search_escape, grid, safety, distances, cell, self.horizon)
+
+    @classmethod
+    def _search_escape(cls, grid, safety, distances, cell, horizon):
+        starts, neighbors = grid.neighbor_start, grid.neighbors
+        start = grid.id_at(*cell)
+        if start < 0:
+            return cell, []
+        came_from = {start: None}
+        frontier = [start]
+        best, best_score = start, safety.escape_score(start, distances)
+
+        for _ in range(horizon):
+            next_frontier = []
+            for cell_id in frontier:
+                for neighbor in neighbors[starts[cell_id]:starts[cell_id + 1]]:
+                    # Never plan a route through the player's cell
+                    if neighbor in came_from or distances[neighbor] == 0:
+                        continue
+                    came_from[neighbor] = cell_id
+                    next_frontier.append(neighbor)
+
+                    score = safety.escape_score(neighbor, distances)
+                    if score > best_score:
+                        best, best_score = neighbor, score
+            frontier = next_frontier
+
+        return cell, cls._reconstruct_path(came_from, best, grid)
+
+    @staticmethod
+    def _reconstruct_path(came_from, current, grid):
         """Reconstruct the path from the came_from map."""
+        cell_size = grid.cell_size
         path = []
-        while current in came_from:
-            x, y = current
+        while came_from.get(current) is not None:
+            x, y = grid.cell_of(current)
             path.append((x * cell_size + cell_size // 2, y * cell_size + cell_size // 2))  # Convert to pixel positions
             current = came_from[current]
         path.reverse()  # Reverse to get the path from start to goal
         return path
 
 
+class DistanceField:
+    """
+    Breadth-first distances from the player's cell to every walkable cell of a maze.
+    Rebuilt only when the player changes cell and shared by every ghost chasing on that maze.
+    Distances are indexed by the grid's walkable ids and the search walks its CSR adjacency.
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        self.grid = maze.grid
+        self.source = None  # (col, row) the distances were computed from
+        self.unreached = array("i", [-1]) * len(self.grid)
+        self.distances = array("i", self.unreached)  # Walkable id -> distance, -1 if unreachable
+
+    def update(self, source):
+        """Recompute the field if the source cell moved since the last call."""
+        if source == self.source:
+            return
+        self.source = source
+
+        grid = self.grid
+        source_id = grid.id_at(*source)
+        if source_id in grid.distance_tables:
+            self.distances = grid.distance_tables[source_id]  # Precomputed by the level compiler
+            return
+
+        starts, neighbors = grid.neighbor_start, grid.neighbors
+        distances = array("i", self.unreached)
+        if source_id >= 0:
+            distances[source_id] = 0
+            frontier = [source_id]
+            step = 0
+            while frontier:
+                step += 1
+                next_frontier = []
+                for cell_id in frontier:
+                    for neighbor in neighbors[starts[cell_id]:starts[cell_id + 1]]:
+                        if distances[neighbor] < 0:
+                            distances[neighbor] = step
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+        self.distances = distances
+
+    def distance(self, cell):
+        """Distance from the source to a (col, row) cell, or -1 if it is unreachable or out of bounds."""
+        cell_id = self.grid.id_at(*cell)
+        return self.distances[cell_id] if cell_id >= 0 else -1
+
+    def next_step(self, cell, rng=random):
+        """
+        Return the neighbouring cell one step closer to the source, or None if already there or unreachable.
+        Ties between equally short routes are broken randomly (with `rng`) to keep ghosts unpredictable.
+        """
+        grid = self.grid
+        cell_id = grid.id_at(*cell)
+        if cell_id < 0 or self.distances[cell_id] <= 0:
+            return None
+        closer = self.distances[cell_id] - 1
+        best = [neighbor for neighbor in grid.neighbors_of(cell_id) if self.distances[neighbor] == closer]
+        return grid.cell_of(rng.choice(best) if len(best) > 1 else best[0])
+
+
+class GridDistances:
+    """
+    Grid (Manhattan) distances from a source cell, indexed by walkable id like DistanceField.distances
+    but computed on lookup, so there is nothing to rebuild when the source moves.
+    """
+    def __init__(self, grid, source):
+        self.id_cells, self.cols = grid.id_cells, grid.cols
+        self.col, self.row = source
+
+    def __getitem__(self, cell_id):
+        index = self.id_cells[cell_id]
+        return abs(index % self.cols - self.col) + abs(index // self.cols - self.row)
+
+
+_distance_fields = weakref.WeakKeyDictionary()
+
+def get_distance_field(maze):
+    """Return the distance field shared by all ghosts on this maze, creating it on first use."""
+    field = _distance_fields.get(maze)
+    if field is None:
+        field = DistanceField(maze)
+        _distance_fields[maze] = field
+    return field
+
+
+class SafetyMap:
+    """
+    Static per-maze data for fleeing ghosts: a bonus for junctions (many ways out) or
+    penalty for dead ends (one way out), per walkable id of the maze grid.
+    """
+    JUNCTION_BONUS = 2
+    DEAD_END_PENALTY = 4
+
+    def __init__(self, maze):
+        grid = maze.grid
+        self.shape_bonus = array("b", bytes(len(grid)))
+        for cell_id in range(len(grid)):
+            degree = grid.degree(cell_id)
+            if degree <= 1:
+                self.shape_bonus[cell_id] = -self.DEAD_END_PENALTY
+            elif degree >= 3:
+                self.shape_bonus[cell_id] = self.JUNCTION_BONUS
+
+    def escape_score(self, cell_id, distances):
+        """Higher is safer: distance from the player (by walkable id) plus the cell's shape bonus."""
+        return distances[cell_id] + self.shape_bonus[cell_id]
+
+
+_safety_maps = weakref.WeakKeyDictionary()
+
+def get_safety_map(maze):
+    """Return the safety map for this maze, building it on first use."""
+    safety = _safety_maps.get(maze)
+    if safety is None:
+        safety = SafetyMap(maze)
+        _safety_maps[maze] = safety
+    return safety
+
 
 class ChaseMovement(MovementStrategy):
     def __init__(self):
-        self.path = []  # List of (x, y) grid positions to follow
-        self.target_cell = None  # The current target cell on the path
+        self.target_cell = None  # Pixel centre of the cell the ghost is heading to
+        self.path = []  # Cell ids left on the current route segment (hierarchical mazes only)
+        self.goal_field = None  # GoalField the segment was planned on
 
     def move(self, ghost, maze, player):
-        # Recalculate the path if necessary
-        ghost.timer_counter += 1
-        if ghost.timer_counter >= ghost.direction_timer or not self.path:
-            self.path = self._calculate_path(ghost, player, maze)
-            ghost.timer_counter = 0  # Reset the timer
-
-        # Follow the path if it exists
-        if self.path:
-            if not self.target_cell:  # Get the next cell if no target is set
-                self.target_cell = self.path.pop(0)
-
-            # Move toward the target cell
+        player_cell = (player.rect.centerx // maze.cell_size, player.rect.centery // maze.cell_size)
+        hierarchical = uses_hierarchy(maze)
+        if not hierarchical:
+            # All chasing ghosts read the same field, so it is only rebuilt when the player changes cell
+            field = get_distance_field(maze)
+            field.update(player_cell)
+
+        # Pick the next cell once the previous one has been reached
+        if not self.target_cell:
+            cell = (ghost.rect.centerx // maze.cell_size, ghost.rect.centery // maze.cell_size)
+            if hierarchical:
+                next_cell = self._next_cell_on_route(maze, cell, player_cell)
+            else:
+                next_cell = field.next_step(cell, ghost.rng.chase)
+            if next_cell:
+                x, y = next_cell
+                self.target_cell = (x * maze.cell_size + maze.cell_size // 2, y * maze.cell_size + maze.cell_size // 2)
+
+        if self.target_cell:
             self._move_toward_target(ghost)
 
+    def _next_cell_on_route(self, maze, cell, player_cell):
+        """
+        Next cell towards the player on an arena maze, planned with the cluster graph (see hpa.py).
+        Segments are refined one cluster at a time through the plan scheduler, and the ghost
+        keeps walking its old segment while a new one waits. Inside the player's cluster the
+        ghost re-aims at the player's current cell every step.
+        """
+        grid = maze.grid
+        cell_id, goal = grid.id_at(*cell), grid.id_at(*player_cell)
+        if cell_id < 0 or goal < 0 or cell_id == goal:
+            return None
+        field = get_goal_field(maze, goal)
+        local = field.graph.local_path(cell_id, goal) if field.graph.cluster_of[cell_id] == field.cluster else None
+        if local is not None:
+            self.path, self.goal_field = local, field
+        else:
+            scheduler = get_plan_scheduler(maze)
+            self._adopt_segment(cell_id, scheduler.result(self))
+            if (field is not self.goal_field or not self.path
+                    or self.path[0] not in grid.neighbors_of(cell_id)) and not scheduler.waiting(self):
+                # Under a tick budget a fresh field's expansion is also shared out across ticks
+                max_settle = SETTLE_PER_QUERY if scheduler.budget is not None else None
+                scheduler.submit(self, partial(self._plan_segment, field, cell_id, goal, max_settle))
+                self._adopt_segment(cell_id, scheduler.result(self))
+        if self.path and self.path[0] not in grid.neighbors_of(cell_id):
+            self.path = []  # Left over from before a jump (a reset or respawn) while a new segment waits
+        return grid.cell_of(self.path.pop(0)) if self.path else None
+
+    @staticmethod
+    def _plan_segment(field, start, goal, max_settle):
+        return field, start, field.next_path(start, goal, max_settle) or []
+
+    def _adopt_segment(self, cell_id, planned):
+        """
+        Switch to a planned (field, start, segment) if it was planned from the ghost's cell.
+        A PENDING segment is dropped, so the ghost asks again on its next move.
+        """
+        if planned is not None and planned[1] == cell_id and planned[2] is not PENDING:
+            self.goal_field, _, self.path = planned
+
     def _move_toward_target(self, ghost):
         """Move the ghost toward the target cell."""
         target_x, target_y = self.target_cell
@@ -172,65 +374,4 @@ class ChaseMovement(MovementStrategy):
             # Snap to the target cell to ensure precise alignment
             ghost.rect.centerx = target_x
             ghost.rect.centery = target_y
-
-            # Set the next target cell or finish the path
-            self.target_cell = None if not self.path else self.path.pop(0)
-
-    def _calculate_path(self, ghost, player, maze):
-        """A* algorithm to find the shortest path to the player with random deviations."""
-        start = (ghost.rect.centerx // maze.cell_size, ghost.rect.centery // maze.cell_size)
-        goal = (player.rect.centerx // maze.cell_size, player.rect.centery // maze.cell_size)
-
-        # Add random deviations to the goal to introduce unpredictability
-        random_offset = random.choice([-1, 0, 1])  # Deviate target by -1, 0, or 1 cell
-        goal = (goal[0] + random_offset, goal[1] + random_offset)
-
-        # Priority queue for A*
-        open_set = []
-        heapq.heappush(open_set, (0, start))  # (priority, cell)
-
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: self._heuristic(start, goal)}
-
-        while open_set:
-            _, current = heapq.heappop(open_set)
-
-            if current == goal:
-                return self._reconstruct_path(came_from, current, maze.cell_size)
-
-            for neighbor in self._get_neighbors(current, maze):
-                tentative_g_score = g_score[current] + 1
-
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + self._heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-
-        return []
-
-    def _heuristic(self, cell, goal):
-        """Heuristic function for A* (Manhattan distance with randomness)."""
-        return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
-
-    def _get_neighbors(self, cell, maze):
-        """Get walkable neighbors of a cell."""
-        x, y = cell
-        neighbors = []
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # Left, Right, Up, Down
-            nx, ny = x + dx, y + dy
-            # Check bounds and walkable cells
-            if 0 <= ny < len(maze.layout) and 0 <= nx < len(maze.layout[ny]) and maze.layout[ny][nx] != 1:
-                neighbors.append((nx, ny))
-        return neighbors
-
-    def _reconstruct_path(self, came_from, current, cell_size):
-        """Reconstruct the path from the came_from map."""
-        path = []
-        while current in came_from:
-            x, y = current
-            path.append((x * cell_size + cell_size // 2, y * cell_size + cell_size // 2))  # Convert to pixel positions
-            current = came_from[current]
-        path.reverse()  # Reverse to get the path from start to goal
-        return path
+            self.target_cell = None
@@ -2,16 +2,16 @@
 from observer_pattern import Subject
 
 class SuperPlayerDecorator(Subject):
-    def __init__(self, player):
+    def __init__(self, player, duration=300):
         super().__init__()
         self.originalPlayer = player  # Reference to the original player
         self.player = player
-        self.super_mode_timer = 300  # Duration of super mode (e.g., 300 frames)
+        self.super_mode_timer = duration  # Duration of super mode (e.g., 300 frames)
 
     def __getattr__(self, name):
         return getattr(self.player, name)
 
-    def update(self, maze, ghosts):
+    def update(self, maze, ghosts, ghost_grid=None):
         self.super_mode_timer -= 1
 
         # Temporarily increase speed
@@ -23,11 +23,13 @@ class SuperPlayerDecorator(Subject):
         # Delegate update logic to the wrapped player
         self.player.update(maze, ghosts)
 
-        # Handle ghost collisions
-        for ghost in ghosts:
+        # Handle ghost collisions, only testing ghosts near the player when a broad phase is given
+        nearby = ghost_grid.query(self.player.rect) if ghost_grid else ghosts
+        for ghost in nearby:
             if self.player.rect.colliderect(ghost.rect):
-                self.notify_observers("ghost_eaten", {"ghost": ghost})
                 ghost.remove(maze)
+                if ghost_grid:
+                    ghost_grid.move(ghost)
 
         # Revert to the original player if timer expires
         if self.super_mode_timer <= 0:
@@ -0,0 +1,77 @@
+# SINGLETON PATTERN
+import os
+
+class AssetCache:
+    """
+    Loads, scales and converts each sprite once and hands the same surface to every caller.
+    Surfaces loaded before the display exists are converted the first time they are
+    requested afterwards, since convert() needs a display mode. pygame is only imported by
+    the first load, so headless code that imports the sprites stays cheap to import.
+    """
+    _instance = None
+
+    @staticmethod
+    def getInstance():
+        if AssetCache._instance is None:
+            AssetCache()
+        return AssetCache._instance
+
+    def __init__(self, resource_dir="./resources"):
+        if AssetCache._instance is not None:
+            raise Exception("This class is a singleton!")
+        AssetCache._instance = self
+        self.resource_dir = resource_dir
+        self.images = {}  # (filename, size) -> surface
+        self.unconverted = set()  # Keys whose surface still needs convert()/convert_alpha()
+        self.hits = 0
+        self.misses = 0
+
+    def get_image(self, filename, size=None):
+        """
+        Return the image from the resources folder, scaled to `size` if given.
+        Raises pygame.error like pygame.image.load if the file can't be loaded.
+        """
+        import pygame
+        key = (filename, size)
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            image = pygame.image.load(os.path.join(self.resource_dir, filename))
+            if size:
+                image = pygame.transform.scale(image, size)
+            self.images[key] = image
+            self.unconverted.add(key)
+        else:
+            self.hits += 1
+
+        if key in self.unconverted and pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+            self.images[key] = image
+            self.unconverted.discard(key)
+        return image
+
+    def get_sprite(self, filename, size, fallback_color=None):
+        """
+        get_image() for a sprite, with the fallback for a missing or broken file: a plain square
+        of `size` filled with `fallback_color`, or None without one (to keep the current look).
+        """
+        import pygame
+        try:
+            return self.get_image(filename, size)
+        except pygame.error:
+            if fallback_color is None:
+                return None
+            image = pygame.Surface(size)
+            image.fill(fallback_color)
+            return image
+
+    def clear(self):
+        """Drop every cached surface and reset the counters, e.g. before pygame.quit()."""
+        self.images.clear()
+        self.unconverted.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Cache counters, e.g. for a debug overlay or benchmarks."""
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.images)}
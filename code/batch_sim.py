@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from simulation import GameSimulation, random_policy, DIRECTIONS
+from pellet_store import NO_PELLET
+from maze_grid import WALL, JAIL
+from level_file import load_level
+
+METRICS = ("score", "level", "lives_lost", "ticks")
+
+# Direction name for each (dx, dy) cell step
+STEP_DIRECTIONS = {(-1, 0): "left", (1, 0): "right", (0, -1): "up", (0, 1): "down"}
+
+
+def pellet_bot_policy(seed=0, wander=0.05):
+    """
+    Bot that walks the shortest route to the nearest pellet, replanning whenever it enters
+    a new cell or stops moving. A small chance of a random turn keeps it from looping forever.
+    """
+    rng = random.Random(seed)
+    state = {"cell": None, "center": None, "direction": None}
+
+    def policy(sim):
+        maze = sim.map
+        center = sim.player.rect.center
+        cell = (center[0] // maze.cell_size, center[1] // maze.cell_size)
+        stuck = center == state["center"]  # Walked into a wall, e.g. after a random turn
+        state["center"] = center
+        if cell == state["cell"] and not stuck:
+            return state["direction"]
+        state["cell"] = cell
+
+        if rng.random() < wander:
+            state["direction"] = rng.choice(DIRECTIONS)
+            return state["direction"]
+
+        # Breadth-first search to the closest pellet, remembering the first step taken
+        grid, pellets = maze.grid, maze.pellets
+        first_steps = {cell: None}
+        frontier = [cell]
+        while frontier:
+            next_frontier = []
+            for x, y in frontier:
+                if pellets.kind_at(x, y) != NO_PELLET and (x, y) != cell:
+                    state["direction"] = STEP_DIRECTIONS[first_steps[(x, y)]]
+                    return state["direction"]
+                for dx, dy in STEP_DIRECTIONS:
+                    nx, ny = x + dx, y + dy
+                    if (nx, ny) not in first_steps and grid.code(nx, ny) not in (WALL, JAIL):
+                        first_steps[(nx, ny)] = first_steps[(x, y)] or (dx, dy)
+                        next_frontier.append((nx, ny))
+            frontier = next_frontier
+        return state["direction"]
+    return policy
+
+
+def scripted_policy(directions):
+    """Replay a fixed list of inputs (direction names or None), looping when it runs out."""
+    def policy(sim):
+        return directions[(sim.frame_count) % len(directions)] if directions else None
+    return policy
+
+
+POLICIES = {
+    "random": lambda seed, script: random_policy(seed),
+    "pellet": lambda seed, script: pellet_bot_policy(seed),
+    "scripted": lambda seed, script: scripted_policy(script),
+}
+
+
+def run_game(job):
+    """
+    Play one seeded game to game over (or `max_ticks`) and return its outcome.
+    Runs inside a worker process, so the job is a plain picklable dict.
+    """
+    # Every worker maps the same compiled level file, so the maze data is shared, not copied
+    layout = load_level(job["level"]) if job.get("level") else None
+    sim = GameSimulation(ghost_count=job["ghost_count"], swarm=job["swarm"], seed=job["seed"], tuning=job["tuning"],
+                         layout=layout)
+    policy = POLICIES[job["policy"]](job["seed"], job.get("script"))
+    starting_lives = sim.event_manager.player_lives
+
+    while sim.state != "game_over" and sim.frame_count < job["max_ticks"]:
+        sim.step(policy(sim))
+
+    return {
+        "seed": job["seed"],
+        "state": sim.state,
+        "score": sim.score_manager.get_current_score(),
+        "level": sim.event_manager.current_level,
+        "lives_lost": starting_lives - sim.event_manager.player_lives,
+        "ticks": sim.frame_count,
+    }
+
+
+def summarize(outcomes, elapsed):
+    """Merge per-game outcomes into summary statistics."""
+    summary = {"games": len(outcomes), "elapsed_s": elapsed,
+               "games_per_s": len(outcomes) / elapsed if elapsed > 0 else float("inf"),
+               "final_states": dict(Counter(outcome["state"] for outcome in outcomes))}
+    for metric in METRICS:
+        values = [outcome[metric] for outcome in outcomes]
+        summary[metric] = {
+            "mean": statistics.fmean(values),
+            "median": statistics.median(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "min": min(values),
+            "max": max(values),
+        }
+    return summary
+
+
+def run_batch(games, policy="pellet", ghost_count=4, swarm=False, tuning=None, max_ticks=20000,
+              first_seed=0, workers=None, script=None, level=None):
+    """Fan `games` seeded games out over a process pool and return (outcomes, summary)."""
+    jobs = [{"seed": first_seed + index, "policy": policy, "ghost_count": ghost_count, "swarm": swarm,
+             "tuning": tuning or {}, "max_ticks": max_ticks, "script": script, "level": level}
+            for index in range(games)]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        outcomes = [run_game(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(run_game, jobs, chunksize=max(1, games // (workers * 4))))
+    elapsed = time.perf_counter() - start
+    return outcomes, summarize(outcomes, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many seeded headless games in parallel and summarise the outcomes.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="pellet")
+    parser.add_argument("--script", help="comma-separated directions for the scripted policy, e.g. right,right,down,")
+    parser.add_argument("--ghosts", type=int, default=4)
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy ghost swarm backend")
+    parser.add_argument("--level", help="play on a level file made by compile_level.py")
+    parser.add_argument("--player-speed", type=int)
+    parser.add_argument("--ghost-speed", type=int)
+    parser.add_argument("--direction-timer", type=int)
+    parser.add_argument("--super-mode-duration", type=int)
+    parser.add_argument("--max-ticks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    tuning = {name: value for name, value in (("player_speed", args.player_speed), ("ghost_speed", args.ghost_speed),
+                                              ("direction_timer", args.direction_timer),
+                                              ("super_mode_duration", args.super_mode_duration))
+              if value is not None}
+    script = [direction or None for direction in args.script.split(",")] if args.script else None
+
+    outcomes, summary = run_batch(args.games, args.policy, args.ghosts, args.swarm, tuning, args.max_ticks,
+                                  args.seed, args.workers, script, args.level)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{summary['games']} games in {summary['elapsed_s']:.2f}s ({summary['games_per_s']:.1f} games/s)")
+        print(f"final states: {summary['final_states']}")
+        for metric in METRICS:
+            stats = summary[metric]
+            print(f"{metric:>10}: mean {stats['mean']:.1f}  median {stats['median']}  stdev {stats['stdev']:.1f}  "
+                  f"min {stats['min']}  max {stats['max']}")
@@ -0,0 +1,342 @@
+# BENCHMARK SUITE
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Offscreen unless a real display is asked for
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep stdout clean for --json
+
+import argparse
+import gc
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import pygame
+from maze import Maze, tiled_layout
+from player import Player
+from enemy import Enemy
+from rng import RngStreams
+from simulation import DIRECTIONS
+from MovementStrategy import ChaseMovement, ScaredMovement
+from hpa import ClusterGraph, GoalField
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(CODE_DIR, "benchmarks_baseline.json")
+CELL_SIZE = 25
+
+# (tiles across, tiles down) of the built-in level; 1x1 is the normal 32x23 maze
+MAZE_SIZES = {"32x23": (1, 1), "64x46": (2, 2), "128x92": (4, 4)}
+GHOST_COUNTS = (4, 50, 500)
+ARENA_TILES = (16, 22)  # 512x506 cells, big enough for hierarchical pathfinding
+
+
+def open_cells(maze):
+    """Corridor cells (not walls or jail) in a fixed order."""
+    return [(col, row) for row, line in enumerate(maze.layout) for col, cell in enumerate(line) if cell in (0, 2)]
+
+
+def far_apart_cells(maze):
+    """Two corridor cells on opposite sides of the maze, for forcing full path rebuilds."""
+    cells = open_cells(maze)
+    return cells[0], cells[-1]
+
+
+def place(entity, cell):
+    entity.rect.center = (cell[0] * CELL_SIZE + CELL_SIZE // 2, cell[1] * CELL_SIZE + CELL_SIZE // 2)
+
+
+# Each benchmark is a setup function returning (run, ops): `run()` does `ops` operations
+# and is what gets timed. Setup runs again before every repeat so repeats do identical work.
+
+def bench_chase_path(layout):
+    def setup():
+        maze = Maze(layout=layout)
+        player = Player(CELL_SIZE, maze)
+        ghost = Enemy(CELL_SIZE, maze, strategy=ChaseMovement(), rng=RngStreams(1))
+        start, far = far_apart_cells(maze)
+        ops = 200
+
+        def run():
+            strategy = ghost.strategy
+            for i in range(ops):
+                # The player jumps across the maze every call, so each call plans from scratch
+                place(player, far if i % 2 else start)
+                place(ghost, start if i % 2 else far)
+                strategy.target_cell = None
+                strategy.move(ghost, maze, player)
+        return run, ops
+    return setup
+
+
+def bench_scared_path(layout):
+    def setup():
+        maze = Maze(layout=layout)
+        player = Player(CELL_SIZE, maze)
+        ghost = Enemy(CELL_SIZE, maze, strategy=ScaredMovement(), rng=RngStreams(1))
+        cells = open_cells(maze)
+        ops = 200
+
+        def run():
+            strategy = ghost.strategy
+            for i in range(ops):
+                place(player, cells[(i * 7919) % len(cells)])
+                place(ghost, cells[(i * 104729) % len(cells)])
+                strategy.path, strategy.target_cell = [], None
+                ghost.timer_counter = ghost.direction_timer  # Forces a replan
+                strategy.move(ghost, maze, player)
+        return run, ops
+    return setup
+
+
+def bench_hierarchical_query(layout, built, cold=False):
+    """
+    Ghost queries on a GoalField. Warm: 200 queries after the first ghosts already expanded the
+    shared search. Cold: the first far query on a fresh field, as when the player enters a new
+    cluster, which is where the expansion cost lands (unless spread with max_settle).
+    `built` is a list shared by the scenarios, holding the (maze, graph) once built.
+    """
+    def setup():
+        if not built:
+            # Built on first use and kept, since the graph never changes for a layout
+            maze = Maze(layout=layout)
+            graph = ClusterGraph(maze.grid)
+            graph.build_all_edges()
+            built.extend((maze, graph))
+        maze, graph = built
+        rng = random.Random(1)
+        if cold:
+            queries = [(GoalField(graph, goal), rng.randrange(len(maze.grid)), goal)
+                       for goal in [rng.randrange(len(maze.grid)) for _ in range(5)]]
+        else:
+            goal = rng.randrange(len(maze.grid))
+            field = GoalField(graph, goal)
+            queries = [(field, rng.randrange(len(maze.grid)), goal) for _ in range(200)]
+            for field, start, goal in queries[:20]:
+                field.next_path(start, goal)  # Expand the shared search the way the first ghosts would
+
+        def run():
+            for field, start, goal in queries:
+                field.next_path(start, goal)
+        return run, len(queries)
+    return setup
+
+
+def bench_wall_collision(layout):
+    def setup():
+        maze = Maze(layout=layout)
+        rng = random.Random(1)
+        width, height = len(layout[0]) * CELL_SIZE, len(layout) * CELL_SIZE
+        rects = [pygame.Rect(rng.randrange(width - CELL_SIZE), rng.randrange(height - CELL_SIZE), CELL_SIZE, CELL_SIZE)
+                 for _ in range(5000)]
+
+        def run():
+            collides = maze.collides_with_wall
+            for rect in rects:
+                collides(rect)
+        return run, len(rects)
+    return setup
+
+
+def bench_maze_draw(layout):
+    def setup():
+        maze = Maze(layout=layout)
+        surface = pygame.Surface((len(layout[0]) * CELL_SIZE, len(layout) * CELL_SIZE))
+        ops = 20
+
+        def run():
+            for _ in range(ops):
+                maze.draw(surface)
+        return run, ops
+    return setup
+
+
+def bench_maze_draw_viewport(layout):
+    def setup():
+        maze = Maze(layout=layout)
+        surface = pygame.Surface((800, 600))
+        width, height = maze.pixel_size()
+        # Views spread over the maze, as a scrolling camera would see it
+        views = [pygame.Rect(x, y, 800, 600) for x, y in zip(range(0, max(width - 800, 1), 97),
+                                                             itertools.cycle(range(0, max(height - 600, 1), 61)))]
+        ops = 20
+
+        def run():
+            for i in range(ops):
+                maze.draw(surface, views[i % len(views)])
+        return run, ops
+    return setup
+
+
+def bench_main_game(layout, ghost_count, swarm=False):
+    def setup():
+        from game import GameEngine  # Opens the (dummy) display, so only imported when needed
+        engine = GameEngine(ghost_count=ghost_count, swarm=swarm, seed=1, layout=layout)
+        engine.wait_until_loaded()
+        engine.state = "playing"
+        # A fixed input script instead of the keyboard: each direction held for 15 ticks
+        script = random.Random(1).choices(DIRECTIONS, k=64)
+        engine.replay_inputs = itertools.cycle([direction for direction in script for _ in range(15)])
+        ops = 120
+
+        def run():
+            for _ in range(ops):
+                engine.main_game(())
+                # Resolve transitions the way run() would, minus the timed screens
+                if engine.state == "life_lost":
+                    engine.state = "playing"
+                elif engine.state == "level_complete":
+                    engine.add_new_ghost()
+                    engine.reset_level()
+                elif engine.state == "game_over":
+                    engine.event_manager.player_lives = 3
+                    engine.state = "playing"
+        return run, ops
+    return setup
+
+
+def bench_cold_start():
+    def setup():
+        # A fresh interpreter runs game.py until the menu is on screen and loading has finished
+        command = [sys.executable, os.path.join(CODE_DIR, "game.py"), "--startup-time"]
+
+        def run():
+            subprocess.run(command, cwd=CODE_DIR, check=True, stdout=subprocess.DEVNULL)
+        return run, 1
+    return setup
+
+
+def build_suite(quick=False):
+    """Name -> setup function for every benchmark scenario."""
+    sizes = dict(list(MAZE_SIZES.items())[:2]) if quick else MAZE_SIZES
+    ghost_counts = GHOST_COUNTS[:2] if quick else GHOST_COUNTS
+    suite = {"cold_start/game_py": bench_cold_start()}
+    for size_name, tiles in sizes.items():
+        layout = tiled_layout(*tiles)
+        suite[f"chase_path/{size_name}"] = bench_chase_path(layout)
+        suite[f"scared_path/{size_name}"] = bench_scared_path(layout)
+        suite[f"wall_collision/{size_name}"] = bench_wall_collision(layout)
+        suite[f"maze_draw/{size_name}"] = bench_maze_draw(layout)
+        suite[f"maze_draw_viewport/{size_name}"] = bench_maze_draw_viewport(layout)
+        for ghost_count in ghost_counts:
+            suite[f"main_game/{size_name}/{ghost_count}_ghosts"] = bench_main_game(layout, ghost_count)
+        if not quick and _numpy_available():
+            suite[f"main_game/{size_name}/{GHOST_COUNTS[-1]}_ghosts_swarm"] = \
+                bench_main_game(layout, GHOST_COUNTS[-1], swarm=True)
+    if not quick:
+        arena_layout, arena = tiled_layout(*ARENA_TILES), []
+        suite["hierarchical_query/512x506"] = bench_hierarchical_query(arena_layout, arena)
+        suite["hierarchical_query_cold/512x506"] = bench_hierarchical_query(arena_layout, arena, cold=True)
+    return suite
+
+
+def _numpy_available():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def time_benchmark(setup, repeats):
+    """Best-of-`repeats` time per operation in microseconds, with the GC paused like timeit."""
+    samples = []
+    for _ in range(repeats):
+        run, ops = setup()
+        gc.collect()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        samples.append(elapsed / ops * 1e6)
+    return {"us_per_op": min(samples), "median_us_per_op": sorted(samples)[len(samples) // 2],
+            "ops": ops, "repeats": repeats}
+
+
+def environment():
+    return {"python": platform.python_version(), "pygame": pygame.version.ver,
+            "platform": platform.platform(), "machine": platform.machine()}
+
+
+def compare(results, baseline, tolerance):
+    """Benchmarks slower than the baseline by more than `tolerance` (0.3 = 30%)."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        ratio = result["us_per_op"] / reference["us_per_op"]
+        result["baseline_us_per_op"] = reference["us_per_op"]
+        result["ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time pathfinding, collision, drawing and full game ticks "
+                                                 "and compare them with a stored baseline.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="skip the largest maze and ghost count")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed slowdown against the baseline before failing (default 0.3 = 30%%)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="re-time apparent regressions this many times before reporting them")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    pygame.init()
+    suite = {name: setup for name, setup in build_suite(args.quick).items() if args.filter in name}
+    results = {}
+    for name, setup in suite.items():
+        results[name] = time_benchmark(setup, args.repeats)
+        if not args.json:
+            print(f"{name:<40} {results[name]['us_per_op']:>12.2f} us/op", file=sys.stderr)
+
+    report = {"environment": environment(), "results": results, "regressions": []}
+    if args.save_baseline:
+        # Merge, so a filtered run only replaces the benchmarks it measured
+        baseline = {"results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        baseline["environment"] = report["environment"]
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("environment") != report["environment"]:
+            print("warning: baseline was recorded in a different environment", file=sys.stderr)
+        report["regressions"] = compare(results, baseline, args.tolerance)
+        # Timing noise on a busy machine looks like a regression; only keep ones that reproduce
+        for _ in range(args.retries):
+            if not report["regressions"]:
+                break
+            for name in report["regressions"]:
+                retry = time_benchmark(suite[name], args.repeats)
+                if retry["us_per_op"] < results[name]["us_per_op"]:
+                    results[name] = retry
+            report["regressions"] = compare({name: results[name] for name in report["regressions"]},
+                                            baseline, args.tolerance)
+
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        for name in report["regressions"]:
+            result = results[name]
+            print(f"REGRESSION {name}: {result['us_per_op']:.2f} us/op vs baseline "
+                  f"{result['baseline_us_per_op']:.2f} ({result['ratio']:.2f}x)")
+        if not report["regressions"]:
+            print(f"{len(results)} benchmarks, no regressions")
+    sys.exit(1 if report["regressions"] else 0)
@@ -0,0 +1,17 @@
+import pygame
+
+class Camera:
+    """
+    The part of the maze shown on screen. It keeps its target centred and stops at the
+    maze edges; a maze smaller than the view stays pinned to the top-left corner.
+    """
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.rect = pygame.Rect(0, 0, view_width, view_height)  # Visible area, in maze pixels
+        self.world_width = world_width
+        self.world_height = world_height
+
+    def follow(self, target):
+        """Centre the view on `target` (a rect in maze pixels)."""
+        x = min(max(target.centerx - self.rect.width // 2, 0), max(self.world_width - self.rect.width, 0))
+        y = min(max(target.centery - self.rect.height // 2, 0), max(self.world_height - self.rect.height, 0))
+        self.rect.topleft = (x, y)
@@ -0,0 +1,96 @@
+import argparse
+import ast
+import os
+import time
+from maze import Maze, tiled_layout
+from maze_grid import EMPTY, WALL, SUPER, JAIL, JAIL_EXIT
+from level_file import save_level, load_level
+
+# Characters accepted in text levels, besides the digit codes themselves
+TEXT_CODES = {"#": WALL, ".": EMPTY, "o": SUPER, "=": JAIL, "-": JAIL_EXIT}
+CELL_CODES = frozenset(TEXT_CODES.values())
+
+
+def _cell_code(char):
+    code = TEXT_CODES[char] if char in TEXT_CODES else int(char)
+    if code not in CELL_CODES:
+        raise ValueError(f"{char!r} is not a cell code")
+    return code
+
+
+def parse_text_layout(text):
+    """
+    A layout drawn as text, one row per line: '#' wall, '.' pellet, 'o' super pellet,
+    '=' jail, '-' jail exit, or the cell code digits 0-4. Blank lines and lines starting
+    with ';' are ignored.
+    """
+    layout = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith(";"):
+            continue
+        try:
+            layout.append([_cell_code(char) for char in line])
+        except ValueError:
+            raise ValueError(f"Unknown cell character in row {len(layout) + 1}: {line!r}") from None
+    return layout
+
+
+def parse_list_layout(text):
+    """A legacy layout written as a Python or JSON list of rows, optionally assigned (`layout = [...]`)."""
+    return ast.literal_eval(text[text.index("["):text.rindex("]") + 1])
+
+
+def read_layout(source):
+    """Layout from a text or list file, or the built-in level for the source name 'builtin'."""
+    if source == "builtin":
+        return Maze().layout
+    with open(source) as file:
+        text = file.read()
+    return parse_list_layout(text) if text.lstrip().startswith(("[", "layout")) else parse_text_layout(text)
+
+
+def compile_source(source, output, tiles=1, distances_from=None):
+    """
+    Compile one layout into a level file. Distance tables are stored for `distances_from`
+    (col, row) cells, by default the player start, where every life begins.
+    """
+    layout = read_layout(source)
+    if tiles > 1:
+        layout = tiled_layout(tiles, tiles, layout)
+    maze = Maze(layout=layout)
+    if distances_from is None:
+        distances_from = [maze.grid.first_cell_with(EMPTY)]
+    save_level(maze, output, distances_from)
+    return maze
+
+
+def parse_cell(text):
+    col, row = text.split(",")
+    return int(col), int(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile maze layouts into memory-mapped level files.")
+    parser.add_argument("sources", nargs="+", help="text or list layout files, or 'builtin' for the built-in level")
+    parser.add_argument("--output", "-o", required=True,
+                        help="level file to write, or a directory when compiling several sources")
+    parser.add_argument("--tiles", type=int, default=1, help="tile each layout N x N times")
+    parser.add_argument("--distances-from", type=parse_cell, action="append", metavar="COL,ROW",
+                        help="store a distance table from this cell (repeatable; default: the player start)")
+    parser.add_argument("--no-distances", action="store_true", help="leave out the precomputed distance tables")
+    args = parser.parse_args()
+
+    if len(args.sources) > 1:
+        os.makedirs(args.output, exist_ok=True)
+    for source in args.sources:
+        output = args.output
+        if len(args.sources) > 1:
+            output = os.path.join(args.output, os.path.splitext(os.path.basename(source))[0] + ".paclvl")
+        maze = compile_source(source, output, args.tiles, [] if args.no_distances else args.distances_from)
+
+        start = time.perf_counter()
+        load_level(output)
+        elapsed = time.perf_counter() - start
+        print(f"{source} -> {output}: {maze.grid.cols}x{maze.grid.rows}, {os.path.getsize(output)} bytes, "
+              f"opens in {elapsed * 1000:.2f}ms")
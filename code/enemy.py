@@ -1,19 +1,25 @@
-import pygame
-import random
 from observer_pattern import Subject
+from assets import AssetCache
+from rng import RngStreams
+from profiler import FrameProfiler
+from maze_grid import EMPTY, JAIL, JAIL_EXIT
 from MovementStrategy import *
 
+JAIL_TICKS = 600  # 10 seconds in jail, then the ghost respawns on the jail exit
+RELEASE_DELAY = (60, 180)  # 1-3 seconds, drawn the first time a ghost is in jail
+DIRECTION_TIMER = 60  # Frames between random direction changes
+
 class Enemy(Subject):
     colors = [(255, 0, 0), (255, 192, 203), (0, 255, 0), (0, 0, 255)]  # Red, Pink, Green, Blue
     color_index = 0
 
-    def __init__(self, cell_size, maze, position=None, strategy=None):
+    def __init__(self, cell_size, maze, position=None, strategy=None, rng=None):
         super().__init__()
+        self.rng = rng if rng else RngStreams()
         if position is None:
-            walkable_cells = [(col_idx * maze.cell_size, row_idx * maze.cell_size)
-                              for row_idx, row in enumerate(maze.layout)
-                              for col_idx, cell in enumerate(row) if cell == 0]
-            position = random.choice(walkable_cells)
+            # Spawn on a random pathway cell (value 0)
+            index = self.rng.spawn.choice(maze.grid.cells_by_code[EMPTY])
+            position = (index % maze.grid.cols * maze.cell_size, index // maze.grid.cols * maze.cell_size)
         self.cell_size = cell_size
         self.maze = maze
         self.in_jail = False
@@ -23,23 +29,20 @@ class Enemy(Subject):
 
         # Initialize movement attributes
         self.timer_counter = 0  # Counts frames to control movement direction change
-        self.direction_timer = 60  # Frames to wait before changing direction
+        self.direction_timer = DIRECTION_TIMER  # Frames to wait before changing direction
         self.speed = 3
-        self.current_direction = random.choice(["x", "y"])  # Direction: "x" or "y"
-        self.current_step = random.choice([-self.speed, self.speed])  # Movement step: positive or negative
+        self.current_direction = self.rng.spawn.choice(["x", "y"])  # Direction: "x" or "y"
+        self.current_step = self.rng.spawn.choice([-self.speed, self.speed])  # Movement step: positive or negative
         
         self.strategy = strategy if strategy else RandomMovement()
+        self.profiler = FrameProfiler.getInstance()  # Times each strategy call when enabled
 
         self.position = position
         self.color = Enemy.colors[Enemy.color_index]
         Enemy.color_index = (Enemy.color_index + 1) % len(Enemy.colors)
 
-        try:
-            self.image = pygame.image.load(f"./resources/ghost_{Enemy.color_index}.png")
-            self.image = pygame.transform.scale(self.image, (cell_size, cell_size))
-        except pygame.error:
-            self.image = pygame.Surface((cell_size, cell_size))
-            self.image.fill(self.color)
+        self.image = AssetCache.getInstance().get_sprite(f"ghost_{Enemy.color_index}.png", (cell_size, cell_size),
+                                                         self.color)
 
         self.rect = self.image.get_rect(center=(self.position[0] + maze.cell_size // 2,
                                                  self.position[1] + maze.cell_size // 2))
@@ -48,7 +51,7 @@ class Enemy(Subject):
         if self.in_jail:
             if not self.start_delay_applied:
                 # Apply a random release delay once the game has started
-                self.release_delay = random.randint(60, 180)  # 1-3 seconds at 60 FPS
+                self.release_delay = self.rng.jail.randint(*RELEASE_DELAY)
                 self.start_delay_applied = True
 
             if self.release_delay > 0:
@@ -61,6 +64,10 @@ class Enemy(Subject):
                     self.in_jail = False  # Exit jail
                 else:
                     self.handle_jail(maze)  # Move toward the exit
+        elif self.profiler.enabled:
+            start = self.profiler.begin()
+            self.strategy.move(self, maze, player)
+            self.profiler.mark("ghost.strategy", start)
         else:
             self.strategy.move(self, maze, player)
 
@@ -68,7 +75,7 @@ class Enemy(Subject):
         """Check if the ghost is at the designated jail exit."""
         col = self.rect.centerx // self.cell_size
         row = self.rect.centery // self.cell_size
-        return maze.layout[row][col] == 4  # '4' marks the jail exit
+        return maze.grid.code(col, row) == JAIL_EXIT  # '4' marks the jail exit
 
     def set_strategy(self, strategy):
         """Chance the movement strategy of the ghost."""
@@ -77,16 +84,16 @@ class Enemy(Subject):
     def handle_jail(self, maze):
         """Movement restricted to jail cells and handling release after timer."""
         self.jail_timer += 1
-        if self.jail_timer >= 600:  # 10 seconds in jail
-            # Find the '4' cell in the maze for respawn
-            for row_idx, row in enumerate(maze.layout):
-                for col_idx, cell in enumerate(row):
-                    if cell == 4:  # Respawn point
-                        # Move to the cell above the jail
-                        self.rect.center = (
-                            col_idx * maze.cell_size + maze.cell_size // 2,
-                            row_idx * maze.cell_size + maze.cell_size // 2
-                        )
+        if self.jail_timer >= JAIL_TICKS:
+            # Respawn on the '4' cell (the last one, if the maze has several)
+            exit_cell = maze.grid.last_cell_with(JAIL_EXIT)
+            if exit_cell:
+                # Move to the cell above the jail
+                col_idx, row_idx = exit_cell
+                self.rect.center = (
+                    col_idx * maze.cell_size + maze.cell_size // 2,
+                    row_idx * maze.cell_size + maze.cell_size // 2
+                )
             self.in_jail = False
             self.jail_timer = 0
             return
@@ -94,8 +101,8 @@ class Enemy(Subject):
         # Jail movement: restricted to '3' cells
         self.timer_counter += 1
         if self.timer_counter >= self.direction_timer:
-            self.current_direction = random.choice(["x", "y"])
-            self.current_step = random.choice([-self.speed, self.speed])
+            self.current_direction = self.rng.jail.choice(["x", "y"])
+            self.current_step = self.rng.jail.choice([-self.speed, self.speed])
             self.timer_counter = 0
 
         if self.current_direction == "x":
@@ -113,10 +120,7 @@ class Enemy(Subject):
         col = self.rect.centerx // self.cell_size
         row = self.rect.centery // self.cell_size
 
-        if 0 <= row < len(self.maze.layout) and 0 <= col < len(self.maze.layout[row]):
-            is_valid = self.maze.layout[row][col] == 3
-            return is_valid
-        return False
+        return self.maze.grid.code(col, row) == JAIL
     
     def check_wall_or_restricted_cell(self, maze):
         """
@@ -124,14 +128,13 @@ class Enemy(Subject):
         Ghosts avoid '3' cells unless they are in jail.
         """
         # Check wall collision
-        for wall in maze.walls:
-            if self.rect.colliderect(wall):
-                return True
+        if maze.collides_with_wall(self.rect):
+            return True
 
         # Check if the ghost is moving into a '3' cell
         col = self.rect.centerx // self.cell_size
         row = self.rect.centery // self.cell_size
-        if not self.in_jail and maze.layout[row][col] == 3:
+        if not self.in_jail and maze.grid.code(col, row) == JAIL:
             return True
 
         return False
@@ -141,35 +144,36 @@ class Enemy(Subject):
         self.in_jail = True
         self.jail_timer = 0
 
-        for row_idx, row in enumerate(maze.layout):
-            for col_idx, cell in enumerate(row):
-                if cell == 3:
-                    self.rect.topleft = (col_idx * self.cell_size, row_idx * self.cell_size)
-                    return
+        jail_cell = maze.grid.first_cell_with(JAIL)
+        if jail_cell:
+            self.rect.topleft = (jail_cell[0] * self.cell_size, jail_cell[1] * self.cell_size)
 
     def set_scared(self):
         """Change the ghost's appearance to the scared look."""
-        try:
-            self.image = pygame.image.load(r"./resources/scared_ghost.png")
-            self.image = pygame.transform.scale(self.image, (self.cell_size, self.cell_size))
-        except pygame.error:
+        image = AssetCache.getInstance().get_sprite("scared_ghost.png", (self.cell_size, self.cell_size))
+        if image is None:
             print("Error loading scared ghost image. Retaining current appearance.")
+        else:
+            self.image = image
 
     def reset_appearance(self):
         """Reset the ghost's appearance to its original look."""
-        # Reload the image based on the assigned color
-        try:
-            if self.color == (255, 0, 0):  # Red ghost
-                self.image = pygame.image.load(r"./resources/ghost_0.png")
-            elif self.color == (0, 255, 0):  # Green ghost
-                self.image = pygame.image.load(r"./resources/ghost_1.png")
-            elif self.color == (255, 192, 203):  # Pink ghost
-                self.image = pygame.image.load(r"./resources/ghost_2.png")
-            elif self.color == (0, 0, 255):  # Blue ghost
-                self.image = pygame.image.load(r"./resources/ghost_3.png")
-            self.image = pygame.transform.scale(self.image, (self.cell_size, self.cell_size))
-        except pygame.error:
+        # Look up the image based on the assigned color
+        if self.color == (255, 0, 0):  # Red ghost
+            filename = "ghost_0.png"
+        elif self.color == (0, 255, 0):  # Green ghost
+            filename = "ghost_1.png"
+        elif self.color == (255, 192, 203):  # Pink ghost
+            filename = "ghost_2.png"
+        elif self.color == (0, 0, 255):  # Blue ghost
+            filename = "ghost_3.png"
+        else:
+            return
+        image = AssetCache.getInstance().get_sprite(filename, (self.cell_size, self.cell_size))
+        if image is None:
             print("Error resetting ghost appearance. Retaining current look.")
+        else:
+            self.image = image
 
 
     def draw(self, screen):
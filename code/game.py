@@ -1,99 +1,168 @@
+import time
+STARTED = time.perf_counter()  # Reference point for the time-to-first-frame measurement
+
 import pygame
-from player import Player
-from enemy import Enemy
-from maze import Maze
 from score_manager import ScoreManager
-from game_event_manager import GameEventManager
-from SuperPlayerDecorator import SuperPlayerDecorator
-from MovementStrategy import ScaredMovement, ChaseMovement
+from simulation import GameSimulation
+from renderer import DirtyRectRenderer, CameraRenderer
+from camera import Camera
+from maze import tiled_layout
+from level_file import load_level
+from assets import AssetCache
+from text_cache import TextCache
+from MovementStrategy import get_distance_field, get_safety_map
+from hpa import get_cluster_graph, uses_hierarchy
+import argparse
 import sys
-import random
+import threading
 
 # Screen configuration
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
 cell_size = 25
 FPS = 60
+TICK_SECONDS = 1 / FPS  # Fixed simulation step; timers and speeds in the rules count these ticks
+MAX_TICKS_PER_FRAME = 8  # Per unit of speed; if frames take longer the game slows down instead of skipping steps
+TRANSITION_TICKS = {"life_lost": FPS * 2, "level_complete": FPS * 3}  # How long each timed screen stays up
 
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
 
-# Fonts
-pygame.init()
-title_font = pygame.font.Font(None, 100)
-text_font = pygame.font.Font(None, 36)
-
-# Load the PAAAC-MAN image
-try:
-    paaacman_image = pygame.image.load("./resources/PAAAC.jpg")
-    paaacman_image = pygame.transform.scale(paaacman_image, (100, 100))
-except pygame.error:
-    print("ERROR: Unable to load the image.")
-    sys.exit()
-
-class GameEngine:
-    def __init__(self):
+def render_text(font, text, color):
+    """Render text through the shared cache so repeated labels are rasterised once."""
+    return TextCache.getInstance().render(font, text, color)
+
+def read_keyboard_direction():
+    """Translate the arrow keys currently held into a direction name, or None."""
+    keys = pygame.key.get_pressed()
+    if keys[pygame.K_LEFT]:
+        return "left"
+    elif keys[pygame.K_RIGHT]:
+        return "right"
+    elif keys[pygame.K_UP]:
+        return "up"
+    elif keys[pygame.K_DOWN]:
+        return "down"
+    return None
+
+class GameEngine(GameSimulation):
+    """
+    The game window and screen state machine on top of GameSimulation.
+    Only the display, fonts and menu image are set up before the start menu is drawn; the
+    maze, sprites and score data load on a background thread while the menu is up.
+    """
+    def __init__(self, ghost_count=4, swarm=False, seed=None, replay=None, record_path=None, layout=None,
+                 trace_path=None, report_startup=False, speed=1.0, fps=FPS, plan_thread=False):
+        pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("PAAAC-MAN Arcade Game")
         self.clock = pygame.time.Clock()
+        self.title_font = TextCache.getInstance().get_font(100)
+        self.text_font = TextCache.getInstance().get_font(36)
+        try:
+            self.menu_image = AssetCache.getInstance().get_image("PAAAC.jpg", (100, 100))
+        except pygame.error:
+            print("ERROR: Unable to load the image.")
+            sys.exit()
         self.lives_display = pygame.Surface((30,30))
         self.lives_display.fill((255, 255, 0))
         self.username = ""
 
-
-        # Initialize game elements
-        self.map = Maze(SCREEN_WIDTH, SCREEN_HEIGHT, cell_size)
-        self.player = Player(cell_size, self.map)
-        self.ghosts = [Enemy(cell_size, self.map, strategy=ChaseMovement()) for _ in range(4)]
-        self.score_manager = ScoreManager()
-        self.event_manager = GameEventManager(self)
+        if replay:
+            # A recording brings its own setup; its inputs replace the keyboard
+            ghost_count, swarm, seed = replay.ghost_count, replay.swarm, replay.seed
         self.game_over_timer = None
-
+        self.replay_inputs = iter(replay) if replay else None
+        self.record_path = record_path
+        self.trace_path = trace_path
         self.running = True
-        self.state = "start_menu"
-        self.frame_count = 0
-
-        # Place 2 ghosts in jail
-        self.ghosts[2].remove(self.map)
-        self.ghosts[3].remove(self.map)
-
-        # Register observers
-        self.player.add_observer(self.event_manager)
-        for ghost in self.ghosts:
-            ghost.add_observer(self.event_manager)
+        self.speed = speed  # Fast-forward multiplier: simulation steps per step of real time
+        self.fps = fps  # Render rate cap; drawing interpolates between simulation steps
+        self.tick_backlog = 0.0  # Seconds of (scaled) real time not yet simulated
+        self.transition_ticks = 0  # Steps left on the current timed screen
+        self.previous_positions = {}
+        self.start_requested = bool(replay)  # Replays skip the menu once loading is done
+        self.startup_times = {}  # "first_frame" / "loaded" -> seconds since game.py started
+        self.report_startup = report_startup  # Print startup_times and exit once loaded
+
+        self.loaded = threading.Event()
+        self.load_error = None
+        self.loader = threading.Thread(target=self.load_game, args=(ghost_count, swarm, seed, layout, plan_thread),
+                                       name="game-loader", daemon=True)
+        self.loader.start()
+
+    def load_game(self, ghost_count, swarm, seed, layout, plan_thread=False):
+        """Build the simulation, sprites, score data and renderer. Runs on the loader thread."""
+        try:
+            super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, cell_size, score_manager=ScoreManager.getInstance(),
+                             ghost_count=ghost_count, swarm=swarm, seed=seed, layout=layout, plan_thread=plan_thread)
+            if self.trace_path:
+                self.profiler.enable()
+
+            # Mazes bigger than the window scroll with the player; only what is in view gets drawn
+            maze_width, maze_height = self.map.pixel_size()
+            if maze_width > SCREEN_WIDTH or maze_height > SCREEN_HEIGHT:
+                self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, maze_width, maze_height)
+                self.renderer = CameraRenderer(self.map, self.camera)
+            else:
+                self.camera = None
+                self.renderer = DirtyRectRenderer(self.map)
+
+            # Build the pathfinding data the first tick would otherwise stall on
+            if uses_hierarchy(self.map):
+                get_cluster_graph(self.map).build_all_edges()
+            else:
+                get_distance_field(self.map).update((self.player.rect.centerx // cell_size,
+                                                     self.player.rect.centery // cell_size))
+            get_safety_map(self.map)
+        except BaseException as error:
+            self.load_error = error
+        finally:
+            self.startup_times["loaded"] = time.perf_counter() - STARTED
+            self.loaded.set()
+
+    def wait_until_loaded(self):
+        """Block until the loader thread is done, re-raising anything it failed with."""
+        self.loader.join()
+        if self.load_error:
+            raise self.load_error
 
     def start_menu(self, events):
-        """Render the start menu."""
+        """Render the start menu. A key press starts the game as soon as loading is done."""
         self.screen.fill(BLACK)
-        title_text = title_font.render("PAAAC-MAN", True, YELLOW)
+        title_text = render_text(self.title_font, "PAAAC-MAN", YELLOW)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
         self.screen.blit(title_text, title_rect)
 
         # Display image
-        self.screen.blit(paaacman_image, (SCREEN_WIDTH // 2 - paaacman_image.get_width() // 2, SCREEN_HEIGHT // 2))
+        self.screen.blit(self.menu_image, (SCREEN_WIDTH // 2 - self.menu_image.get_width() // 2, SCREEN_HEIGHT // 2))
 
-        # Start prompt
-        prompt = text_font.render("Press any key to start", True, WHITE)
+        # Start prompt, or a loading note if a key was pressed before the game was ready
+        if self.start_requested and not self.loaded.is_set():
+            prompt = render_text(self.text_font, "Loading...", WHITE)
+        else:
+            prompt = render_text(self.text_font, "Press any key to start", WHITE)
         self.screen.blit(prompt, (SCREEN_WIDTH // 3, SCREEN_HEIGHT - 100))
 
         pygame.display.flip()
+        self.startup_times.setdefault("first_frame", time.perf_counter() - STARTED)
 
         for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                self.state = "playing"
+                self.start_requested = True
 
     def pause_menu(self, events):
         """Render the pause menu."""
         self.screen.fill(BLACK)
-        pause_text = title_font.render("Paused", True, YELLOW)
+        pause_text = render_text(self.title_font, "Paused", YELLOW)
         pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
         self.screen.blit(pause_text, pause_rect)
 
-        resume_prompt = text_font.render("Press R to Resume", True, WHITE)
-        quit_prompt = text_font.render("Press Q to Quit", True, WHITE)
+        resume_prompt = render_text(self.text_font, "Press R to Resume", WHITE)
+        quit_prompt = render_text(self.text_font, "Press Q to Quit", WHITE)
         self.screen.blit(resume_prompt, (SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2))
         self.screen.blit(quit_prompt, (SCREEN_WIDTH // 3, SCREEN_HEIGHT // 2 + 50))
 
@@ -108,133 +177,170 @@ class GameEngine:
                 elif event.key == pygame.K_q:
                     self.running = False
 
-    def life_lost_screen(self):
-        """Display 'Life Lost!' screen for 2 seconds."""
-        buffer_timer = 0
-        while buffer_timer < FPS * 2:  # 2-second buffer
-            self.screen.fill(BLACK)
-            title_font = pygame.font.Font(None, 35)
-
-            # Display 'Life Lost!' message
-            life_lost_text = title_font.render("Life Lost! Sending random ghost to jail and respawning..", True, (255, 0, 0))
-            text_rect = life_lost_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-            self.screen.blit(life_lost_text, text_rect)
+    def life_lost_screen(self, ticks):
+        """Draw the 'Life Lost!' screen, shown for 2 seconds of game time, and count down `ticks` of it."""
+        self.screen.fill(BLACK)
+        title_font = TextCache.getInstance().get_font(35)
 
-            pygame.display.flip()
-            self.clock.tick(FPS)
-            buffer_timer += 1
+        # Display 'Life Lost!' message
+        life_lost_text = render_text(title_font, "Life Lost! Sending random ghost to jail and respawning..", (255, 0, 0))
+        text_rect = life_lost_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        self.screen.blit(life_lost_text, text_rect)
+        pygame.display.flip()
 
-        # Resume gameplay after showing the screen
-        self.state = "playing"
+        self.transition_ticks -= ticks
+        if self.transition_ticks <= 0:
+            # Resume gameplay after showing the screen
+            self.state = "playing"
 
-    def level_complete_screen(self):
-        """Show the 'Level Complete' transition screen."""
-        buffer_timer = 0
-        while buffer_timer < FPS * 3:  # 3-second buffer
-            self.screen.fill(BLACK)
-            title_font = pygame.font.Font(None, 80)
-            text_font = pygame.font.Font(None, 36)
+    def level_complete_screen(self, ticks):
+        """Draw the 'Level Complete' screen, shown for 3 seconds of game time, then set up the next level."""
+        self.screen.fill(BLACK)
+        title_font = TextCache.getInstance().get_font(80)
 
-            # Display level complete message
-            level_complete_text = title_font.render("Level Completed!", True, (255, 255, 0))
-            next_level_text = text_font.render(f"Next level will have {len(self.ghosts) + 1} ghosts!", True, (255, 255, 255))
+        # Display level complete message
+        level_complete_text = render_text(title_font, "Level Completed!", (255, 255, 0))
+        next_level_text = render_text(self.text_font, f"Next level will have {len(self.ghosts) + 1} ghosts!", (255, 255, 255))
 
-            self.screen.blit(level_complete_text, (SCREEN_WIDTH // 4, SCREEN_HEIGHT // 3))
-            self.screen.blit(next_level_text, (SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2))
-            pygame.display.flip()
+        self.screen.blit(level_complete_text, (SCREEN_WIDTH // 4, SCREEN_HEIGHT // 3))
+        self.screen.blit(next_level_text, (SCREEN_WIDTH // 4, SCREEN_HEIGHT // 2))
+        pygame.display.flip()
 
-            self.clock.tick(FPS)
-            buffer_timer += 1
+        self.transition_ticks -= ticks
+        if self.transition_ticks <= 0:
+            self.add_new_ghost()
+            self.reset_level()
 
     def add_new_ghost(self):
         """Add a new ghost for the next level."""
-        ghost_image_index = random.randint(0,3)  # Cycle through ghost_0.png to ghost_3.png
-        new_ghost = Enemy(self.map.cell_size, self.map, strategy=ChaseMovement())
+        ghost_image_index = self.rng.skin.randint(0,3)  # Cycle through ghost_0.png to ghost_3.png
+        super().add_new_ghost()
+        new_ghost = self.ghosts[-1]
         try:
-            new_ghost.image = pygame.image.load(f"./resources/ghost_{ghost_image_index}.png")
-            new_ghost.image = pygame.transform.scale(new_ghost.image, (self.map.cell_size, self.map.cell_size))
+            new_ghost.image = AssetCache.getInstance().get_image(f"ghost_{ghost_image_index}.png", (self.map.cell_size, self.map.cell_size))
         except pygame.error:
             print(f"Warning: Could not load ghost image ghost_{ghost_image_index}.png")
-        self.ghosts.append(new_ghost)
-
-    def reset_level(self):
-        """Reset the level by regenerating pellets and resetting positions."""
-        self.map.generate_maze()  # Reset pellets
-        self.player.rect.topleft = (self.map.cell_size, self.map.cell_size)  # Reset player position
-        for ghost in self.ghosts:
-            ghost.remove(self.map)  # Reset ghosts to jail
-        self.state = "playing"
 
-    def reset_player_and_ghosts(self):
-        self.player.rect.topleft = (self.map.cell_size, self.map.cell_size)  # Reset player position
-        for ghost in self.ghosts:
-            if not ghost.in_jail:
-                ghost.remove(self.map)
-                break
-
-    def draw_lives(self):
-        """Draw remaining lives on the screen using the Pac-Man image."""
+    def lives_sprites(self):
+        """Remaining lives as Pac-Man icons near the bottom of the screen, as (image, rect) pairs."""
         try:
-            pacman_image = pygame.image.load(r"./resources/pacman.png")
-            pacman_image = pygame.transform.scale(pacman_image, (30, 30))  # Resize to fit as life icons
-
-            for i in range(self.event_manager.player_lives):
-                x = 10 + i * 40  # Space out the icons
-                y = SCREEN_HEIGHT - 50  # Position near the bottom of the screen
-                self.screen.blit(pacman_image, (x, y))
+            pacman_image = AssetCache.getInstance().get_image("pacman.png", (30, 30))  # Resize to fit as life icons
         except pygame.error:
             print("Error loading Pac-Man image for lives. Defaulting to text display.")
-            # Fallback to drawing yellow rectangles if image loading fails
-            for i in range(self.event_manager.player_lives):
-                pygame.draw.rect(self.screen, (255, 255, 0), (10 + i * 40, SCREEN_HEIGHT, 30, 30))
-    
-    def main_game(self, events):
-        """Main game loop."""
-        self.frame_count += 1
+            # Fallback to yellow squares if image loading fails
+            pacman_image = self.lives_display
+
+        sprites = []
+        for i in range(self.event_manager.player_lives):
+            x = 10 + i * 40  # Space out the icons
+            y = SCREEN_HEIGHT - 50  # Position near the bottom of the screen
+            sprites.append((pacman_image, pacman_image.get_rect(topleft=(x, y))))
+        return sprites
 
+    def draw_lives(self):
+        """Draw remaining lives on the screen using the Pac-Man image."""
+        for image, rect in self.lives_sprites():
+            self.screen.blit(image, rect)
+
+    def visible_ghosts(self, focus):
+        """
+        Ghosts to draw this frame. On a scrolling maze the camera follows the `focus` rect
+        (the player as drawn) and only ghosts near the view are looked up, through the collision grid.
+        """
+        if self.camera is None:
+            return self.ghosts
+        self.camera.follow(focus)
+        view = self.camera.rect
+        return [ghost for ghost in self.ghost_grid.query(view) if view.colliderect(ghost.rect)]
+
+    def main_game(self, events, ticks=1, alpha=1.0):
+        """
+        Handle this frame's events, advance the simulation by `ticks` fixed steps and draw the
+        result `alpha` of the way from the previous step to the latest one.
+        Returns the number of steps run, which is fewer if a transition or the replay's end cut it short.
+        """
+        profiler = self.profiler
+        frame_start = profiler.begin()
         for event in events:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.state = "paused"
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                # Frame timing overlay; turning it on also starts recording
+                profiler.show_overlay = not profiler.show_overlay
+                if profiler.show_overlay:
+                    profiler.enable()
             """"    
             DEBUG TO COLLECT ALL PELLETS WITH 'P'
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_p: #DEBUG
                 self.player.collect_all_pellets(self.map)
             """
 
-        self.screen.fill(BLACK)
-
-        # Pellet collection
-        new_player = self.player.collect_pellet(self.map)
-        if isinstance(new_player, SuperPlayerDecorator):
-            self.player = new_player
-
-        # Update the player
-        updated_player = self.player.update(self.map, self.ghosts)
-        if updated_player != self.player:
-            self.player = updated_player
-
-        # Update super mode timer
-        self.event_manager.update_super_mode()
-
-        # Draw maze, player, and ghosts
-        self.map.draw(self.screen)
-        self.player.draw(self.screen)
-        for ghost in self.ghosts:
-            ghost.update(self.map, self.player)
-            ghost.draw(self.screen)
-
-        # Game over conditions
-        if isinstance(self.player, Player) and self.player.collides_with_ghost(self.ghosts):
-            return
-
-        self.draw_lives()
-        self.event_manager.draw_level_display(self.screen, text_font)
+        collided = False
+        ran = 0
+        while ran < ticks and self.state == "playing":
+            # Advance the simulation with the held arrow key, or the next recorded input when replaying
+            input_start = profiler.begin()
+            if self.replay_inputs:
+                direction = next(self.replay_inputs, "end")
+                if direction == "end":
+                    self.running = False
+                    return ran
+            else:
+                direction = read_keyboard_direction()
+            profiler.mark("input", input_start)
+            if ran == ticks - 1:
+                self.remember_positions()  # Drawing interpolates from here to the final step
+            collided = self.tick(direction)
+            ran += 1
+
+        # A collision or transition ends the frame here; the next screen is drawn by run()
+        if collided or self.state != "playing":
+            profiler.mark("frame", frame_start)
+            profiler.end_frame()
+            return ran
+
+        t = profiler.begin()
+
+        # Draw player, ghosts and HUD over the cached maze layers, pushing only what changed
+        player_rect = self.interpolated(self.player, alpha)
+        sprites = [(self.player.image, player_rect)]
+        sprites.extend((ghost.image, self.interpolated(ghost, alpha)) for ghost in self.visible_ghosts(player_rect))
+        hud = self.lives_sprites()
+        hud.append(self.event_manager.level_display(self.text_font))
 
         # Display score
-        score_text = text_font.render(f"Score: {self.score_manager.get_current_score()}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
-
-        pygame.display.flip()       
+        score_text = render_text(self.text_font, f"Score: {self.score_manager.get_current_score()}", WHITE)
+        hud.append((score_text, score_text.get_rect(topleft=(10, 10))))
+        if self.speed != 1:
+            speed_text = render_text(self.text_font, f"x{self.speed:g}", YELLOW)
+            hud.append((speed_text, speed_text.get_rect(topright=(SCREEN_WIDTH - 10, 10))))
+        if profiler.show_overlay:
+            hud.extend(profiler.overlay_sprites(self.text_font))
+        profiler.mark("sprites", t)
+
+        self.renderer.render(self.screen, sprites, hud)
+        profiler.mark("frame", frame_start)
+        profiler.end_frame()
+        return ran
+
+    def remember_positions(self):
+        """Note where the player and ghosts are before a step, for interpolated drawing."""
+        self.previous_positions = {ghost: ghost.rect.topleft for ghost in self.ghosts}
+        self.previous_positions["player"] = self.player.rect.topleft
+
+    def interpolated(self, entity, alpha):
+        """
+        The rect to draw `entity` at: `alpha` of the way from where it was before the last
+        step to where it is now. Jumps longer than a cell (respawns, jail) are not smoothed.
+        """
+        rect = entity.rect
+        previous = self.previous_positions.get("player" if entity is self.player else entity)
+        if previous is None or alpha >= 1:
+            return rect
+        dx, dy = rect.x - previous[0], rect.y - previous[1]
+        if abs(dx) > cell_size or abs(dy) > cell_size:
+            return rect
+        return rect.move(round(dx * (alpha - 1)), round(dy * (alpha - 1)))
 
     def game_over_screen(self):
         """Game over screen with username input and high scores."""
@@ -245,16 +351,16 @@ class GameEngine:
             self.screen.fill(BLACK)
 
             # Display "Game Over" message
-            game_over_text = title_font.render("Game Over", True, YELLOW)
+            game_over_text = render_text(self.title_font, "Game Over", YELLOW)
             game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
             self.screen.blit(game_over_text, game_over_rect)
 
             # Display input prompt and entered username
-            prompt = text_font.render("Enter your name:", True, WHITE)
+            prompt = render_text(self.text_font, "Enter your name:", WHITE)
             prompt_rect = prompt.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
             self.screen.blit(prompt, prompt_rect)
 
-            username_text = text_font.render(self.username, True, WHITE)
+            username_text = render_text(self.text_font, self.username, WHITE)
             username_rect = username_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
             self.screen.blit(username_text, username_rect)
 
@@ -264,7 +370,7 @@ class GameEngine:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
-                    pygame.quit()
+                    self.quit()
                     return
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN and self.username.strip():  # Enter key submits the username
@@ -289,19 +395,26 @@ class GameEngine:
             self.screen.fill(BLACK)
 
             # Display high scores title
-            high_scores_title = title_font.render("High Scores", True, YELLOW)
+            high_scores_title = render_text(self.title_font, "High Scores", YELLOW)
             title_rect = high_scores_title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 6))
             self.screen.blit(high_scores_title, title_rect)
 
-            # Fetch and display high scores
-            high_scores = ScoreManager.getInstance().get_high_scores()
+            # Fetch and display high scores from the leaderboard index
+            score_manager = ScoreManager.getInstance()
+            high_scores = score_manager.get_high_scores()
             y_offset = SCREEN_HEIGHT // 3
             for i, (username, score) in enumerate(high_scores):
-                score_text = text_font.render(f"{i + 1}. {username}: {score}", True, WHITE)
+                score_text = render_text(self.text_font, f"{i + 1}. {username}: {score}", WHITE)
                 self.screen.blit(score_text, (SCREEN_WIDTH // 4, y_offset + i * 30))
 
+            # Show where the player ranks overall
+            rank = score_manager.get_rank(self.username)
+            if rank:
+                rank_text = render_text(self.text_font, f"Your rank: {rank} of {len(score_manager.leaderboard)}", YELLOW)
+                self.screen.blit(rank_text, (SCREEN_WIDTH // 4, y_offset + len(high_scores) * 30 + 20))
+
             # Display exit prompt
-            exit_prompt = text_font.render("Press any key to exit", True, WHITE)
+            exit_prompt = render_text(self.text_font, "Press any key to exit", WHITE)
             self.screen.blit(exit_prompt, (SCREEN_WIDTH // 3, SCREEN_HEIGHT - 100))
 
             pygame.display.flip()
@@ -310,36 +423,127 @@ class GameEngine:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
-                    pygame.quit()
+                    self.quit()
                     return
                 elif event.type == pygame.KEYDOWN:
-                    pygame.quit()
+                    self.quit()
                     sys.exit()
                     return
     def run(self):
-        """Run the game loop."""
+        """
+        Run the game loop. The simulation advances in fixed steps of TICK_SECONDS, as many per
+        frame as real time (times the fast-forward `speed`) calls for, independent of the frame
+        rate; timed screens count down in the same steps.
+        """
+        # The menu stays up until a key was pressed and the loader thread has finished
+        while self.running and not (self.start_requested and self.loaded.is_set()):
+            self.start_menu(pygame.event.get())
+            if self.report_startup and self.loaded.is_set():
+                self.print_startup_times()
+                self.running = False
+            self.clock.tick(FPS)
+        self.wait_until_loaded()
+        self.state = "playing"
+
+        previous_state = None
+        last_frame = time.perf_counter()
         while self.running:
             events = pygame.event.get()
-            if self.state == "start_menu":
-                self.start_menu(events)
-            elif self.state == "playing":
-                self.main_game(events)
-            elif self.state == "paused":
-                self.pause_menu(events)
+            if self.state != previous_state:
+                if self.state == "playing":
+                    self.renderer.invalidate()  # Another screen was drawn over the maze
+                elif self.state in TRANSITION_TICKS:
+                    self.transition_ticks = TRANSITION_TICKS[self.state]
+            previous_state = self.state
+
+            # Real time since the last frame, scaled by the fast-forward multiplier, buys fixed steps.
+            # Time beyond what one frame may run is dropped, so a stall (or frames that stay slow)
+            # slows the game down instead of banking steps to rush through later.
+            now = time.perf_counter()
+            max_ticks = MAX_TICKS_PER_FRAME * max(1, round(self.speed))
+            self.tick_backlog = min(self.tick_backlog + (now - last_frame) * self.speed, max_ticks * TICK_SECONDS)
+            last_frame = now
+            ticks = min(int(self.tick_backlog / TICK_SECONDS), max_ticks)
+
+            if self.state == "playing":
+                ran = self.main_game(events, ticks, self.tick_backlog / TICK_SECONDS - ticks)
+                self.tick_backlog -= ran * TICK_SECONDS
             elif self.state == "life_lost":
-                self.life_lost_screen()
+                self.tick_backlog -= ticks * TICK_SECONDS
+                self.life_lost_screen(ticks)
             elif self.state == "level_complete":
-                self.level_complete_screen()
-                self.add_new_ghost()
-                self.reset_level()
-            elif self.state == "game_over":
-                self.game_over_screen()
+                self.tick_backlog -= ticks * TICK_SECONDS
+                self.level_complete_screen(ticks)
+            else:
+                self.tick_backlog = 0.0  # Menus do not bank time to catch up on afterwards
+                if self.state == "paused":
+                    self.pause_menu(events)
+                elif self.state == "game_over":
+                    self.save_recording()
+                    self.save_trace()
+                    self.game_over_screen()
+                last_frame = time.perf_counter()
+
+            self.clock.tick(self.fps)
+
+        self.save_recording()
+        self.save_trace()
+        self.quit()
+
+    def quit(self):
+        """
+        Close pygame and the simulation. Cached fonts and surfaces die with pygame, so they are
+        dropped too and the next GameEngine in this process loads fresh ones instead of using
+        freed fonts.
+        """
+        if self.loaded.is_set() and self.load_error is None:
+            self.close()
+        TextCache.getInstance().clear()
+        AssetCache.getInstance().clear()
+        pygame.quit()
 
-            self.clock.tick(FPS)
+    def print_startup_times(self):
+        times = self.startup_times
+        print(f"first frame after {times['first_frame'] * 1000:.0f}ms, "
+              f"game loaded after {times['loaded'] * 1000:.0f}ms (since game.py started)")
 
-        pygame.quit()
+    def save_recording(self):
+        """Write the session's seed and inputs if recording was requested."""
+        if self.record_path:
+            self.input_log.save(self.record_path)
+
+    def save_trace(self):
+        """Write the frame profiler's buffer as a trace file if one was requested."""
+        if self.trace_path:
+            self.profiler.export_trace(self.trace_path)
 
 
 if __name__ == "__main__":
-    game = GameEngine()
+    parser = argparse.ArgumentParser(description="PAAAC-MAN Arcade Game")
+    parser.add_argument("--ghosts", type=int, default=4, help="number of ghosts at level 1 (stress mode)")
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy ghost swarm backend")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible session")
+    parser.add_argument("--record", metavar="PATH", help="save the seed and inputs for replay.py")
+    parser.add_argument("--tiles", type=int, default=1,
+                        help="play on an N x N arena built from copies of the level (scrolls with the player)")
+    parser.add_argument("--level", metavar="PATH", help="play on a level file made by compile_level.py")
+    parser.add_argument("--speed", type=float, default=1.0, help="fast-forward multiplier for the simulation")
+    parser.add_argument("--fps", type=int, default=FPS, help="frame rate cap; the simulation always steps at 60 Hz")
+    parser.add_argument("--plan-thread", action="store_true",
+                        help="run queued ghost path searches on a worker thread while frames are drawn")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time to the first frame and until the game is loaded, then exit")
+    parser.add_argument("--trace", metavar="PATH", help="profile every frame and save a Chrome trace file on exit "
+                                                         "(F3 shows the timings in game)")
+    args = parser.parse_args()
+    if args.record and (args.tiles > 1 or args.level):
+        parser.error("recordings only store the seed and inputs, so --record cannot be combined with --tiles or --level")
+    if args.tiles > 1 and args.level:
+        parser.error("--tiles and --level both choose the maze; compile a tiled level with compile_level.py --tiles")
+    layout = tiled_layout(args.tiles, args.tiles) if args.tiles > 1 else None
+    if args.level:
+        layout = load_level(args.level, cell_size)
+    game = GameEngine(ghost_count=args.ghosts, swarm=args.swarm, seed=args.seed, record_path=args.record,
+                      trace_path=args.trace, layout=layout, report_startup=args.startup_time,
+                      speed=args.speed, fps=args.fps, plan_thread=args.plan_thread)
     game.run()
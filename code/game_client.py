@@ -0,0 +1,130 @@
+# NETWORK CLIENT
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from input_log import DIRECTION_CODES
+from simulation import DIRECTIONS
+from net_protocol import (JOIN, INPUT, WELCOME, KEYFRAME, DELTA, PLAYER, SPECTATOR, WELCOME_HEADER, WorldSnapshot,
+                          open_channel)
+
+
+class GameClient:
+    """
+    A connection to a game server that keeps a copy of the world up to date from its
+    keyframes and deltas, checking every delta against the server's checksum.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+        self.role = None  # Granted by the server: PLAYER or SPECTATOR
+        self.cols = self.rows = self.cell_size = 0
+        self.cells = b""  # Maze cell codes, row by row
+        self.world = None  # WorldSnapshot, once the first keyframe arrived
+        self.keyframes = 0
+        self.deltas = 0
+        self.mismatches = 0  # Deltas after which the copy no longer matched the server
+        self.bytes_received = 0
+
+    @staticmethod
+    async def connect(host, port, room="default", role=SPECTATOR, websocket=False):
+        client = GameClient(await open_channel(host, port, websocket))
+        client.channel.send(JOIN + role + room.encode("utf-8"))
+        return client
+
+    def send_input(self, direction):
+        """Hold a direction (or None to let go) until the next call; only the room's player is listened to."""
+        self.channel.send(INPUT + bytes((DIRECTION_CODES[direction],)))
+
+    def handle(self, payload):
+        self.bytes_received += len(payload)
+        kind = payload[:1]
+        if kind == DELTA and self.world:
+            self.deltas += 1
+            if not self.world.apply_delta(payload):
+                self.mismatches += 1
+        elif kind == KEYFRAME:
+            self.keyframes += 1
+            self.world = WorldSnapshot.decode_keyframe(payload)
+        elif kind == WELCOME:
+            self.role = payload[1:2]
+            self.cols, self.rows, self.cell_size = WELCOME_HEADER.unpack_from(payload, 2)
+            self.cells = zlib.decompress(payload[2 + WELCOME_HEADER.size:])
+
+    async def receive(self):
+        """Apply messages as they arrive until the server closes the connection."""
+        try:
+            while True:
+                self.handle(await self.channel.read())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def close(self):
+        self.channel.close()
+
+
+async def run_clients(host, port, room="default", spectators=0, seconds=10.0, websocket=False, seed=0, hold=0.25):
+    """
+    Join a room as its player plus `spectators` extra spectator connections, play random
+    inputs for `seconds`, and return all the clients (the player first).
+    """
+    player = await GameClient.connect(host, port, room, PLAYER, websocket)
+    watchers = [await GameClient.connect(host, port, room, SPECTATOR, websocket) for _ in range(spectators)]
+    clients = [player] + watchers
+    tasks = [asyncio.create_task(client.receive()) for client in clients]
+
+    rng = random.Random(seed)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        player.send_input(rng.choice(DIRECTIONS))
+        await asyncio.sleep(hold)
+
+    for client in clients:
+        client.close()
+    await asyncio.gather(*tasks)
+    return clients
+
+
+def print_summary(clients, seconds):
+    player, watchers = clients[0], clients[1:]
+    world = player.world
+    if world:
+        print(f"{player.cols}x{player.rows} maze, tick {world.tick}, state {world.state}, score {world.score}, "
+              f"level {world.level}, lives {world.lives}, {world.ghost_count} ghosts")
+    for name, group in (("player", [player]), ("spectators", watchers)):
+        if not group:
+            continue
+        received = sum(client.bytes_received for client in group)
+        print(f"{name}: {len(group)} connection(s), {sum(c.keyframes for c in group)} keyframes, "
+              f"{sum(c.deltas for c in group)} deltas, {received / len(group) / seconds / 1024:.1f} KiB/s each, "
+              f"{sum(c.mismatches for c in group)} checksum mismatches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play and watch a game on a game_server.py server, "
+                                                 "checking the streamed state as it arrives.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--room", default="default")
+    parser.add_argument("--spectators", type=int, default=0, help="extra spectator connections to open")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--websocket", action="store_true", help="connect as WebSocket clients instead of plain TCP")
+    parser.add_argument("--local", action="store_true",
+                        help="start a server in this process on a free loopback port and test against it")
+    parser.add_argument("--ghosts", type=int, default=4, help="ghosts per game on the --local server")
+    args = parser.parse_args()
+
+    async def main():
+        server = None
+        host, port = args.host, args.port
+        if args.local:
+            from game_server import GameServer
+            server = GameServer({"ghost_count": args.ghosts})
+            host, port = "127.0.0.1", await server.start("127.0.0.1", 0)
+        try:
+            return await run_clients(host, port, args.room, args.spectators, args.seconds, args.websocket)
+        finally:
+            if server:
+                server.close()
+
+    print_summary(asyncio.run(main()), args.seconds)
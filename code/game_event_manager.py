@@ -1,63 +1,98 @@
 # OBSERVER PATTERN IMPLEMENTATION
 from observer_pattern import Observer
 from MovementStrategy import *
+from text_cache import TextCache
+from game_events import *
 
 class GameEventManager(Observer):
+    # When several transitions are requested in one tick, the highest priority wins
+    STATE_PRIORITY = {"life_lost": 1, "level_complete": 2, "game_over": 3}
+
     def __init__(self, game_engine):
         self.game_engine = game_engine  # Reference to the GameEngine
         self.super_mode_timer = 0  # Frames left for super mode
+        self.super_mode_duration = 300  # Frames a super pellet lasts
         self.player_lives = 3 # Player has 3 lives
         self.current_level = 1  # Start at level 1
         self.max_level = 10  # Maximum number of levels
+        self.pending_state = None  # State transition to apply at the end of the tick
+
+        # Handler table keyed by event class
+        self.handlers = {
+            PelletCollected: self.handle_pellet_collected,
+            SuperPelletCollected: self.handle_super_pellet_collected,
+            GhostEaten: self.handle_ghost_eaten,
+            PlayerCollidedWithGhost: self.handle_player_collision,
+        }
+
+    def handle_event(self, event):
+        """React to a typed game event."""
+        handler = self.handlers.get(type(event))
+        if handler:
+            handler(event)
 
     def update(self, event_type, data):
-        """React to game events."""
-        if event_type == "pellet_collected":
-            self.handle_pellet_collected(data)
-        elif event_type == "super_pellet_collected":
-            self.handle_super_pellet_collected(data)
-        elif event_type == "ghost_eaten":
-            self.handle_ghost_eaten(data)
-        elif event_type == "player_collided_with_ghost":
-            self.handle_player_collision(data)
+        """React to game events sent with the string-based notify_observers API."""
+        event_class = EVENT_TYPES.get(event_type)
+        if event_class:
+            self.handle_event(event_class(**data))
+
+    def request_state(self, state):
+        """Queue a state transition; it is applied once by end_tick()."""
+        if self.pending_state is None or self.STATE_PRIORITY[state] > self.STATE_PRIORITY[self.pending_state]:
+            self.pending_state = state
 
-    def handle_pellet_collected(self, data):
+    def end_tick(self):
+        """Apply the state transition requested during this tick, if any."""
+        state = self.pending_state
+        if state is None:
+            return
+        self.pending_state = None
+        if state == "life_lost":
+            self.game_engine.reset_player_and_ghosts()  # Reset player position
+        self.game_engine.state = state
+
+    def handle_pellet_collected(self, event):
         """Update score and check for level completion."""
         self.game_engine.score_manager.add_score(10)
         if self.game_engine.map.all_pellets_collected():
             if self.current_level < self.max_level:
                 self.current_level += 1
-                self.game_engine.state = "level_complete"
+                self.request_state("level_complete")
             else:
-                self.game_engine.state = "game_over"
+                self.request_state("game_over")
     
+    def level_display(self, font):
+        """Render the current level label, returned as (image, rect) for the renderer."""
+        level_text = TextCache.getInstance().render(font, f"Level: {self.current_level}", (255, 255, 255))
+        return level_text, level_text.get_rect(topleft=(800 - 150, 10))
+
     def draw_level_display(self, screen, font):
         """Draw the current level on the GUI."""
-        level_text = font.render(f"Level: {self.current_level}", True, (255, 255, 255))
-        screen.blit(level_text, (800 - 150, 10))
+        level_text, level_rect = self.level_display(font)
+        screen.blit(level_text, level_rect)
         
-    def handle_super_pellet_collected(self, data):
+    def handle_super_pellet_collected(self, event):
         """Activate super mode and update score."""
         self.game_engine.score_manager.add_score(50)
-        self.super_mode_timer = 300  # 300 frames of super mode
+        self.super_mode_timer = self.super_mode_duration
         
         # Change ghosts to look scared
         for ghost in self.game_engine.ghosts:
             ghost.set_scared()
             ghost.set_strategy(ScaredMovement()) # Change to scared movements
 
-    def handle_player_collision(self, data):
+    def handle_player_collision(self, event):
         """Handle collision between the player and a ghost."""
         self.player_lives -= 1
         
         if self.player_lives > 0:
-            self.game_engine.state = "life_lost"
-            self.game_engine.reset_player_and_ghosts()  # Reset player position
+            self.request_state("life_lost")
         else:
-            self.game_engine.state = "game_over"
+            self.request_state("game_over")
 
 
-    def handle_ghost_eaten(self, data):
+    def handle_ghost_eaten(self, event):
         """Update score for eating a ghost."""
         self.game_engine.score_manager.add_score(200)
 
@@ -0,0 +1,35 @@
+from observer_pattern import Event
+
+class PelletCollected(Event):
+    __slots__ = ("player", "pellet_position")
+    type = "pellet_collected"
+
+    def __init__(self, player, pellet_position):
+        self.player = player
+        self.pellet_position = pellet_position
+
+class SuperPelletCollected(Event):
+    __slots__ = ("player", "pellet_position")
+    type = "super_pellet_collected"
+
+    def __init__(self, player, pellet_position):
+        self.player = player
+        self.pellet_position = pellet_position
+
+class GhostEaten(Event):
+    __slots__ = ("ghost",)
+    type = "ghost_eaten"
+
+    def __init__(self, ghost):
+        self.ghost = ghost
+
+class PlayerCollidedWithGhost(Event):
+    __slots__ = ("player", "ghost")
+    type = "player_collided_with_ghost"
+
+    def __init__(self, player, ghost):
+        self.player = player
+        self.ghost = ghost
+
+# Event class for each string event type, for observers still using notify_observers
+EVENT_TYPES = {event.type: event for event in (PelletCollected, SuperPelletCollected, GhostEaten, PlayerCollidedWithGhost)}
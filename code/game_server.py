@@ -0,0 +1,215 @@
+# AUTHORITATIVE GAME SERVER
+import argparse
+import asyncio
+import zlib
+from simulation import GameSimulation
+from input_log import CODE_DIRECTIONS
+from maze import tiled_layout
+from level_file import load_level
+from net_protocol import (JOIN, INPUT, WELCOME, PLAYER, SPECTATOR, WELCOME_HEADER, WorldSnapshot,
+                          accept_channel)
+
+TICK_SECONDS = 1 / 60  # The same fixed step as game.py
+MAX_CATCH_UP_TICKS = 8  # Steps run back to back after a stall before the backlog is dropped
+SEND_EVERY = 2  # Ticks per snapshot broadcast (30 per second)
+RESTART_TICKS = 180  # Ticks the game over state is shown before the room starts a new game
+MAX_CLIENT_BUFFER = 256 * 1024  # Bytes queued for a client before it is skipped and later resynced
+
+
+class RoomClient:
+    def __init__(self, channel, role):
+        self.channel = channel
+        self.role = role
+        self.synced = False  # Deltas only make sense after a keyframe
+
+
+class GameRoom:
+    """
+    One authoritative game. The simulation steps at 60 Hz from the player's latest input
+    (and waits while the room has no player); every `send_every` ticks the change since the
+    last broadcast is encoded once and the same bytes are written to the player and every
+    spectator. Clients that join, or that fell so far behind that their deltas were skipped,
+    get a keyframe instead.
+    """
+    def __init__(self, name, game_options, send_every=SEND_EVERY):
+        self.name = name
+        self.game_options = game_options
+        self.send_every = send_every
+        self.clients = []
+        self.player = None
+        self.direction = None
+        self.ticks = 0
+        self.task = None  # The run() task, started when the first client joins
+        self.sim = None
+        self.new_game()
+
+    def new_game(self):
+        if self.sim is not None:
+            self.sim.close()
+        self.sim = GameSimulation(**self.game_options)
+        self.sent = None  # Snapshot of the last broadcast, which the next delta is taken against
+        self.game_over_ticks = 0
+        pellets = self.sim.map.pellets
+        pellets.eaten.clear()
+        self.pellet_generation = pellets.generation
+
+    def add(self, channel, role):
+        """Admit a connection; the first to ask to play controls Pac-Man, everyone else spectates."""
+        if role == PLAYER and self.player is None:
+            client = self.player = RoomClient(channel, PLAYER)
+        else:
+            client = RoomClient(channel, SPECTATOR)
+        self.clients.append(client)
+        grid = self.sim.map.grid
+        channel.send(WELCOME + client.role + WELCOME_HEADER.pack(grid.cols, grid.rows, grid.cell_size)
+                     + zlib.compress(bytes(grid.cells)))
+        return client
+
+    def remove(self, client):
+        self.clients.remove(client)
+        if client is self.player:
+            self.player = None
+            self.direction = None
+
+    def handle(self, client, message):
+        if message[:1] == INPUT and client is self.player and len(message) > 1:
+            self.direction = CODE_DIRECTIONS.get(message[1])
+
+    def step(self):
+        if self.player is None:
+            return
+        if self.sim.state == "game_over":
+            self.game_over_ticks += 1
+            if self.game_over_ticks >= RESTART_TICKS:
+                self.new_game()
+            return
+        self.sim.step(self.direction)
+
+    def broadcast(self):
+        snapshot = WorldSnapshot.from_simulation(self.sim)
+        pellets = self.sim.map.pellets
+        if pellets.generation != self.pellet_generation or self.sent is None:
+            # A new level (or game) put the pellets back; deltas only carry eaten ones
+            self.pellet_generation = pellets.generation
+            for client in self.clients:
+                client.synced = False
+        eaten = [row * pellets.cols + col for col, row in pellets.eaten]
+        pellets.eaten.clear()
+
+        # Each message is encoded and framed once per transport, however many clients get it
+        delta, keyframe = None, None
+        framed = {}
+        for client in self.clients:
+            channel = client.channel
+            if channel.buffered() > MAX_CLIENT_BUFFER:
+                client.synced = False  # Skip it until it catches up, then start over from a keyframe
+                continue
+            if client.synced:
+                if delta is None:
+                    delta = snapshot.encode_delta(self.sent, eaten)
+                message = delta
+            else:
+                if keyframe is None:
+                    keyframe = snapshot.encode_keyframe()
+                message = keyframe
+                client.synced = True
+            key = (channel.kind, message is delta)
+            if key not in framed:
+                framed[key] = channel.frame(message)
+            channel.send_framed(framed[key])
+        self.sent = snapshot
+
+    async def run(self):
+        """Step and broadcast on a fixed timestep until the last client leaves."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while self.clients:
+            for _ in range(MAX_CATCH_UP_TICKS):
+                if loop.time() < next_tick:
+                    break
+                self.step()
+                self.ticks += 1
+                if self.ticks % self.send_every == 0:
+                    self.broadcast()
+                next_tick += TICK_SECONDS
+            else:
+                next_tick = loop.time()  # Too far behind to catch up; run at the speed we can
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+        self.sim.close()
+
+
+class GameServer:
+    """
+    Accepts players and spectators over TCP or WebSocket on one port (see net_protocol.py)
+    and runs one GameRoom per room name, created by the first client to join it.
+    """
+    def __init__(self, game_options=None, send_every=SEND_EVERY):
+        self.game_options = game_options if game_options else {}
+        self.send_every = send_every
+        self.rooms = {}
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=7777):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle_connection(self, reader, writer):
+        client, room = None, None
+        try:
+            channel = await accept_channel(reader, writer)
+            message = await channel.read()
+            if message[:1] != JOIN:
+                return
+            room = self.join_room(message[2:].decode("utf-8", "replace") or "default")
+            client = room.add(channel, message[1:2])
+            if len(room.clients) == 1:
+                room.task = asyncio.create_task(room.run())
+            while True:
+                room.handle(client, await channel.read())
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass  # The client left or spoke something else
+        finally:
+            if client:
+                room.remove(client)
+                if not room.clients and self.rooms.get(room.name) is room:
+                    del self.rooms[room.name]
+            writer.close()
+
+    def join_room(self, name):
+        room = self.rooms.get(name)
+        if room is None:
+            room = GameRoom(name, self.game_options, self.send_every)
+            self.rooms[name] = room
+        return room
+
+    def close(self):
+        if self.server:
+            self.server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run games headless and stream them to players and spectators "
+                                                 "over TCP or WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--ghosts", type=int, default=4)
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy ghost swarm backend")
+    parser.add_argument("--tiles", type=int, default=1, help="play on an N x N arena built from copies of the level")
+    parser.add_argument("--level", metavar="PATH", help="play on a level file made by compile_level.py")
+    parser.add_argument("--seed", type=int, help="seed every game with this seed")
+    parser.add_argument("--send-every", type=int, default=SEND_EVERY, help="ticks between snapshots (default 2)")
+    args = parser.parse_args()
+
+    layout = load_level(args.level) if args.level else tiled_layout(args.tiles, args.tiles) if args.tiles > 1 else None
+    game_server = GameServer({"ghost_count": args.ghosts, "swarm": args.swarm, "seed": args.seed, "layout": layout},
+                             args.send_every)
+
+    async def serve():
+        port = await game_server.start(args.host, args.port)
+        print(f"serving on {args.host}:{port} (TCP and WebSocket)")
+        await game_server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,311 @@
+from observer_pattern import Subject
+from assets import AssetCache
+from MovementStrategy import ScaredMovement, get_distance_field
+from maze_grid import EMPTY, WALL, JAIL, JAIL_EXIT
+from enemy import JAIL_TICKS, RELEASE_DELAY, DIRECTION_TIMER
+
+# NumPy is optional and only the swarm backend needs it, so the first GhostSwarm imports it
+np = None
+
+# Neighbour offsets (dx, dy) in the order Left, Right, Up, Down
+OFFSETS_X = (-1, 1, 0, 0)
+OFFSETS_Y = (0, 0, -1, 1)
+
+
+class SwarmGhost(Subject):
+    """
+    Enemy-compatible view of one ghost stored in a GhostSwarm. It exposes the attributes
+    and methods drawing, collisions, tuning and GameEventManager use; movement is done in
+    batch by the swarm, so update() does nothing.
+    """
+    def __init__(self, swarm, index, image, color):
+        super().__init__()
+        self.swarm = swarm
+        self.index = index
+        self.color = color
+        self.normal_image = image
+        self.image = image
+        self.rect = image.get_rect()  # Sprites are scaled to one cell
+        self.speed = swarm.speed
+
+    @property
+    def in_jail(self):
+        return bool(self.swarm.in_jail[self.index])
+
+    @property
+    def direction_timer(self):
+        return int(self.swarm.direction_timer[self.index])
+
+    @direction_timer.setter
+    def direction_timer(self, frames):
+        self.swarm.direction_timer[self.index] = frames
+
+    def update(self, maze, player=None):
+        pass
+
+    def remove(self, maze):
+        self.swarm.send_to_jail(self.index)
+
+    def set_strategy(self, strategy):
+        """Scared and chase strategies map onto the swarm's per-ghost scared flag."""
+        self.swarm.scared[self.index] = isinstance(strategy, ScaredMovement)
+
+    def set_scared(self):
+        image = AssetCache.getInstance().get_sprite("scared_ghost.png", (self.swarm.cell_size, self.swarm.cell_size))
+        if image is None:
+            print("Error loading scared ghost image. Retaining current appearance.")
+        else:
+            self.image = image
+
+    def reset_appearance(self):
+        self.image = self.normal_image
+
+    def draw(self, screen):
+        screen.blit(self.image, self.rect)
+
+
+class GhostSwarm:
+    """
+    Struct-of-arrays ghost backend for stress runs with hundreds of ghosts.
+    Positions, directions, targets, jail state and timers live in NumPy arrays and all
+    ghosts advance in one batched step that chases (or flees) along the shared
+    DistanceField and only ever steps onto cells the layout array marks as walkable.
+
+    The rules are Enemy's, so swarm runs play the same game: free ghosts keep out of
+    jail cells, and a jailed ghost wanders the jail cells until JAIL_TICKS have passed
+    since it was sent there, then respawns on the last jail exit cell.
+    """
+    def __init__(self, maze, count=0, speed=3, seed=None):
+        global np
+        if np is None:
+            try:
+                import numpy as np
+            except ImportError:
+                raise ImportError("GhostSwarm needs NumPy: pip install numpy") from None
+        self.maze = maze
+        self.cell_size = maze.cell_size
+        self.speed = speed
+        self.rng = np.random.default_rng(seed)
+
+        # Layout padded with a ring of walls so neighbour lookups never go out of bounds
+        grid = maze.grid
+        layout = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.rows, grid.cols)
+        self.cell_id_grid = np.frombuffer(grid.ids, dtype=np.int32).reshape(grid.rows, grid.cols)
+        self.rows, self.cols = layout.shape
+        self.offsets_x = np.array(OFFSETS_X, dtype=np.int32)
+        self.offsets_y = np.array(OFFSETS_Y, dtype=np.int32)
+        self.codes = np.full((self.rows + 2, self.cols + 2), WALL, dtype=np.uint8)
+        self.codes[1:-1, 1:-1] = layout
+        # Like Enemy.check_wall_or_restricted_cell: free ghosts never step onto walls or jail cells
+        self.walkable = (self.codes != WALL) & (self.codes != JAIL)
+        self.spawn_cells = self._cells_with(EMPTY)
+        jail_cells, exit_cells = self._cells_with(JAIL), self._cells_with(JAIL_EXIT)
+        self.jail_cell = tuple(jail_cells[0].tolist()) if len(jail_cells) else None  # Where remove() puts ghosts
+        self.exit_cell = tuple(exit_cells[-1].tolist()) if len(exit_cells) else None  # Where they respawn
+
+        self.x = np.zeros(0, dtype=np.int32)  # Rect top-left, in pixels
+        self.y = np.zeros(0, dtype=np.int32)
+        self.direction = np.zeros(0, dtype=np.int8)  # Index into OFFSETS_X/OFFSETS_Y of the last move
+        self.direction_timer = np.zeros(0, dtype=np.int32)  # Frames between random turns in jail
+        self.timer_counter = np.zeros(0, dtype=np.int32)  # Frames since the last turn
+        self.target_x = np.zeros(0, dtype=np.int32)  # Pixel centre of the cell being walked to
+        self.target_y = np.zeros(0, dtype=np.int32)
+        self.has_target = np.zeros(0, dtype=bool)
+        self.in_jail = np.zeros(0, dtype=bool)
+        self.jail_timer = np.zeros(0, dtype=np.int32)  # Frames in jail since it was sent there
+        self.release_delay = np.zeros(0, dtype=np.int32)
+        self.delay_applied = np.zeros(0, dtype=bool)  # The one-off release delay was drawn
+        self.scared = np.zeros(0, dtype=bool)
+        self.ghosts = []
+
+        self.cell_ids = np.zeros(0, dtype=np.int64)  # Cell of each ghost when moved_cells() last ran
+
+        self._field_source = None
+        self._distances = None
+        self.add_ghosts(count)
+
+    def add_ghosts(self, count):
+        """Spawn `count` ghosts on random pellet cells and return their views."""
+        cells = self.spawn_cells[self.rng.integers(0, len(self.spawn_cells), size=count)]
+        self.x = np.concatenate([self.x, (cells[:, 0] * self.cell_size).astype(np.int32)])
+        self.y = np.concatenate([self.y, (cells[:, 1] * self.cell_size).astype(np.int32)])
+        self.direction = np.concatenate([self.direction, self.rng.integers(0, 4, size=count).astype(np.int8)])
+        self.direction_timer = np.concatenate([self.direction_timer, np.full(count, DIRECTION_TIMER, dtype=np.int32)])
+        self.timer_counter = np.concatenate([self.timer_counter, np.zeros(count, dtype=np.int32)])
+        self.target_x = np.concatenate([self.target_x, np.zeros(count, dtype=np.int32)])
+        self.target_y = np.concatenate([self.target_y, np.zeros(count, dtype=np.int32)])
+        self.has_target = np.concatenate([self.has_target, np.zeros(count, dtype=bool)])
+        self.in_jail = np.concatenate([self.in_jail, np.zeros(count, dtype=bool)])
+        self.jail_timer = np.concatenate([self.jail_timer, np.zeros(count, dtype=np.int32)])
+        self.release_delay = np.concatenate([self.release_delay, np.zeros(count, dtype=np.int32)])
+        self.delay_applied = np.concatenate([self.delay_applied, np.zeros(count, dtype=bool)])
+        self.scared = np.concatenate([self.scared, np.zeros(count, dtype=bool)])
+        self.cell_ids = np.concatenate([self.cell_ids, self._current_cell_ids()[len(self.cell_ids):]])
+
+        added = []
+        for index in range(len(self.ghosts), len(self.ghosts) + count):
+            skin = index % 4
+            image = AssetCache.getInstance().get_sprite(f"ghost_{skin}.png", (self.cell_size, self.cell_size),
+                                                        (255, 0, 0))
+            ghost = SwarmGhost(self, index, image, (255, 0, 0))
+            self.ghosts.append(ghost)
+            added.append(ghost)
+        self.sync_rects()
+        return added
+
+    def send_to_jail(self, index):
+        """Put one ghost on the first jail cell and start its jail timer, like Enemy.remove."""
+        self.in_jail[index] = True
+        self.jail_timer[index] = 0
+        self.has_target[index] = False
+        if self.jail_cell:
+            self.x[index] = self.jail_cell[0] * self.cell_size
+            self.y[index] = self.jail_cell[1] * self.cell_size
+        self.ghosts[index].rect.topleft = (int(self.x[index]), int(self.y[index]))
+
+    def update(self, player):
+        """Advance every ghost by one frame."""
+        if not len(self.x):
+            return
+        half, speed = self.cell_size // 2, self.speed
+
+        # Ghosts leaving jail this frame only start moving on the next one
+        free = ~self.in_jail
+        if not free.all():
+            self._update_jailed(np.nonzero(self.in_jail)[0])
+
+        # Free ghosts without a target pick their next cell
+        choosing = free & ~self.has_target
+        if choosing.any():
+            self._choose_targets(np.nonzero(choosing)[0], player)
+
+        # Step towards the target on both axes, then snap when close enough
+        moving = free & self.has_target
+        center_x = self.x + half
+        center_y = self.y + half
+        self.x += (np.sign(self.target_x - center_x) * speed * moving).astype(np.int32)
+        self.y += (np.sign(self.target_y - center_y) * speed * moving).astype(np.int32)
+        arrived = moving & (np.abs(self.x + half - self.target_x) <= speed) & (np.abs(self.y + half - self.target_y) <= speed)
+        self.x[arrived] = self.target_x[arrived] - half
+        self.y[arrived] = self.target_y[arrived] - half
+        self.has_target[arrived] = False
+
+        self.sync_rects()
+
+    def _update_jailed(self, indices):
+        """Enemy.update and handle_jail for the jailed ghosts `indices`."""
+        first = indices[~self.delay_applied[indices]]
+        if len(first):
+            low, high = RELEASE_DELAY
+            self.release_delay[first] = self.rng.integers(low, high + 1, size=len(first))
+            self.delay_applied[first] = True
+
+        # Once the delay is over a ghost standing on the jail exit is free to go
+        delaying = self.release_delay[indices] > 0
+        self.release_delay[indices[delaying]] -= 1
+        at_exit = ~delaying & (self._codes_at(self.x[indices], self.y[indices]) == JAIL_EXIT)
+        self.in_jail[indices[at_exit]] = False
+        walking = indices[~at_exit]
+
+        # After JAIL_TICKS in jail the ghost respawns on the jail exit
+        self.jail_timer[walking] += 1
+        timed_out = self.jail_timer[walking] >= JAIL_TICKS
+        respawned = walking[timed_out]
+        if len(respawned):
+            self.in_jail[respawned] = False
+            self.jail_timer[respawned] = 0
+            if self.exit_cell:
+                self.x[respawned] = self.exit_cell[0] * self.cell_size
+                self.y[respawned] = self.exit_cell[1] * self.cell_size
+        walking = walking[~timed_out]
+        if not len(walking):
+            return
+
+        # The rest wander the jail cells, turning at random every direction_timer frames or at a jail wall
+        self.timer_counter[walking] += 1
+        turning = walking[self.timer_counter[walking] >= self.direction_timer[walking]]
+        self.direction[turning] = self.rng.integers(0, 4, size=len(turning))
+        self.timer_counter[turning] = 0
+        direction = self.direction[walking]
+        new_x = self.x[walking] + self.offsets_x[direction] * self.speed
+        new_y = self.y[walking] + self.offsets_y[direction] * self.speed
+        inside = self._codes_at(new_x, new_y) == JAIL
+        self.x[walking[inside]] = new_x[inside]
+        self.y[walking[inside]] = new_y[inside]
+        blocked = walking[~inside]
+        self.timer_counter[blocked] = self.direction_timer[blocked]
+
+    def _codes_at(self, x, y):
+        """
+        Cell codes under the centres of rects at top-left (x, y). Ghosts stay on the maze, so a
+        step off its edge lands on the padding ring of walls.
+        """
+        half = self.cell_size // 2
+        return self.codes[(y + half) // self.cell_size + 1, (x + half) // self.cell_size + 1]
+
+    def _cells_with(self, code):
+        """(col, row) of every cell with `code`, in row-major order, as an (n, 2) array."""
+        rows, cols = np.nonzero(self.codes[1:-1, 1:-1] == code)
+        return np.stack([cols, rows], axis=1)
+
+    def sync_rects(self):
+        """Copy array positions into the view rects used for drawing and collisions."""
+        for ghost, x, y in zip(self.ghosts, self.x.tolist(), self.y.tolist()):
+            ghost.rect.x = x
+            ghost.rect.y = y
+
+    def moved_cells(self):
+        """Indices of ghosts whose centre changed cell since the last call, for broad-phase upkeep."""
+        current = self._current_cell_ids()
+        moved = np.nonzero(current != self.cell_ids)[0]
+        self.cell_ids = current
+        return moved.tolist()
+
+    def _current_cell_ids(self):
+        half = self.cell_size // 2
+        return ((self.y + half) // self.cell_size).astype(np.int64) * self.cols + (self.x + half) // self.cell_size
+
+    def _distance_grid(self, player):
+        """Shared player distance field as a padded array, refreshed when the player changes cell."""
+        field = get_distance_field(self.maze)
+        field.update((player.rect.centerx // self.cell_size, player.rect.centery // self.cell_size))
+        if field.source != self._field_source or self._distances is None:
+            grid = np.full((self.rows + 2, self.cols + 2), -1, dtype=np.int32)
+            distances = np.frombuffer(field.distances, dtype=np.int32)
+            grid[1:-1, 1:-1] = np.where(self.cell_id_grid >= 0, distances[self.cell_id_grid], -1)
+            self._distances = grid
+            self._field_source = field.source
+        return self._distances
+
+    def _choose_targets(self, indices, player):
+        distances = self._distance_grid(player)
+        half = self.cell_size // 2
+        cols = (self.x[indices] + half) // self.cell_size + 1  # +1 for the padding ring
+        rows = (self.y[indices] + half) // self.cell_size + 1
+        current = distances[rows, cols]
+
+        neighbor_cols = cols[:, None] + self.offsets_x
+        neighbor_rows = rows[:, None] + self.offsets_y
+        walkable = self.walkable[neighbor_rows, neighbor_cols]
+        neighbor_distance = distances[neighbor_rows, neighbor_cols].astype(np.float64)
+
+        # Lower score wins: chasers go downhill, scared ghosts uphill, lost ghosts wander.
+        # The jitter breaks ties randomly without ever beating a one-step difference.
+        jitter = self.rng.random(walkable.shape) * 0.5
+        reachable = (current >= 0)[:, None] & (neighbor_distance >= 0)
+        score = np.where(self.scared[indices][:, None], -neighbor_distance, neighbor_distance)
+        score = np.where(reachable, score, 0.0) + jitter
+        score[~walkable] = np.inf
+        # A chasing ghost already on the player's cell waits for the player to move
+        stay = (current == 0) & ~self.scared[indices]
+
+        best = np.argmin(score, axis=1)
+        has_move = np.isfinite(score[np.arange(len(indices)), best]) & ~stay
+        chosen = indices[has_move]
+        best = best[has_move]
+        target_cols = cols[has_move] + self.offsets_x[best] - 1
+        target_rows = rows[has_move] + self.offsets_y[best] - 1
+        self.target_x[chosen] = target_cols * self.cell_size + half
+        self.target_y[chosen] = target_rows * self.cell_size + half
+        self.has_target[chosen] = True
+        self.direction[chosen] = best
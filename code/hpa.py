@@ -0,0 +1,270 @@
+# HIERARCHICAL PATHFINDING (HPA*)
+import heapq
+import weakref
+from array import array
+
+# Mazes with at least this many walkable cells plan chase routes on the cluster graph;
+# below it one shared breadth-first DistanceField per player move is cheaper.
+HIERARCHICAL_MIN_CELLS = 20000
+
+# Entrances one scheduled ghost query may settle on a GoalField (about 8us each), so the far
+# expansion after the player enters another cluster is spread over ticks
+SETTLE_PER_QUERY = 64
+
+# Cells (Manhattan) the goal may move inside its cluster before its GoalField is rebuilt
+GOAL_DRIFT = 8
+
+# Returned by GoalField.next_path when its settle limit ran out first; ask again on a later tick
+PENDING = "pending"
+
+
+class ClusterGraph:
+    """
+    HPA* abstraction of a MazeGrid. The maze is cut into square clusters; every run of open
+    cells along a border between two clusters gets one entrance (a pair of cells facing each
+    other across the border). GoalField searches over the entrances; ghosts then walk from
+    cluster to cluster one segment at a time.
+
+    Entrances are found up front, which only reads the border cells. The walking distances
+    between a cluster's entrances are computed the first time a search reaches that cluster
+    and kept for as long as the grid lives. Grids never change in place, so a new layout
+    means a new grid and a new graph.
+    """
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-grid.cols // cluster_size)
+        self.clusters_y = -(-grid.rows // cluster_size)
+
+        cols = grid.cols
+        self.cluster_of = array("i", [(index % cols // cluster_size) + (index // cols // cluster_size) * self.clusters_x
+                                      for index in grid.id_cells])
+        self.entrances = {}  # Cluster -> its entrance cell ids
+        self.links = {}  # Entrance id -> entrance ids across the border (one step away)
+        self.edges = {}  # Cluster -> {entrance: [(other entrance, walking distance)]}, filled lazily
+        self._find_entrances()
+
+    def _find_entrances(self):
+        grid, size = self.grid, self.cluster_size
+        for border_col in range(size, grid.cols, size):
+            self._scan_border([(border_col - 1, row, border_col, row) for row in range(grid.rows)])
+        for border_row in range(size, grid.rows, size):
+            self._scan_border([(col, border_row - 1, col, border_row) for col in range(grid.cols)])
+
+    def _scan_border(self, pairs):
+        """Add one entrance in the middle of every run of open cell pairs along a border."""
+        id_at, size = self.grid.id_at, self.cluster_size
+        run = []
+        for index, (col_a, row_a, col_b, row_b) in enumerate(pairs):
+            a, b = id_at(col_a, row_a), id_at(col_b, row_b)
+            if a >= 0 and b >= 0:
+                run.append((a, b))
+            # Runs also end where the border passes from one cluster into the next
+            if run and (a < 0 or b < 0 or (index + 1) % size == 0 or index + 1 == len(pairs)):
+                self._add_entrance(*run[len(run) // 2])
+                run = []
+
+    def _add_entrance(self, a, b):
+        for node, other in ((a, b), (b, a)):
+            cluster = self.cluster_of[node]
+            if node not in self.links:
+                self.entrances.setdefault(cluster, []).append(node)
+                self.links[node] = []
+            self.links[node].append(other)
+
+    def _search_cluster(self, source, cluster, target=-1):
+        """
+        Breadth-first search from `source` that never leaves `cluster`.
+        Returns {cell id: parent} for every cell reached (stopping early once `target` is).
+        """
+        grid, cluster_of = self.grid, self.cluster_of
+        starts, neighbors = grid.neighbor_start, grid.neighbors
+        parents = {source: -1}
+        frontier = [source]
+        while frontier and target not in parents:
+            next_frontier = []
+            for cell_id in frontier:
+                for neighbor in neighbors[starts[cell_id]:starts[cell_id + 1]]:
+                    if neighbor not in parents and cluster_of[neighbor] == cluster:
+                        parents[neighbor] = cell_id
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return parents
+
+    @staticmethod
+    def _path_length(parents, source, target):
+        steps = 0
+        while target != source:
+            target = parents[target]
+            steps += 1
+        return steps
+
+    @staticmethod
+    def _walk_back(parents, source, target):
+        """The cells from `source` (exclusive) to `target` in a search's parent map."""
+        path = []
+        while target != source:
+            path.append(target)
+            target = parents[target]
+        path.reverse()
+        return path
+
+    def _distances_in_cluster(self, source, cluster, targets):
+        """(cell, walking distance inside `cluster` from `source`) for each reachable cell of `targets`."""
+        parents = self._search_cluster(source, cluster)
+        return [(target, self._path_length(parents, source, target))
+                for target in targets if target in parents and target != source]
+
+    def cluster_edges(self, cluster):
+        """Walking distances between the entrances of a cluster, computed on first use."""
+        edges = self.edges.get(cluster)
+        if edges is None:
+            entrances = self.entrances.get(cluster, [])
+            edges = {node: self._distances_in_cluster(node, cluster, entrances) for node in entrances}
+            self.edges[cluster] = edges
+        return edges
+
+    def build_all_edges(self):
+        """Compute every cluster's entrance distances now, e.g. while a loading screen is up."""
+        for cluster in self.entrances:
+            self.cluster_edges(cluster)
+
+    def local_path(self, start, goal):
+        """Cell ids from `start` (exclusive) to `goal` without leaving their shared cluster, or None."""
+        cluster = self.cluster_of[start]
+        if self.cluster_of[goal] != cluster:
+            return None
+        parents = self._search_cluster(start, cluster, goal)
+        if goal not in parents:
+            return None
+        return self._walk_back(parents, start, goal)
+
+
+class GoalField:
+    """
+    Distances from a goal cell to the cluster graph's entrances, for the many-to-one queries of
+    ghosts that all chase the player. It is a Dijkstra search outwards from the goal, resumed
+    only as far as queries need, so ghosts near the player cost little and ghosts far away
+    share one expansion. Each ghost then only searches its own cluster to pick the exit
+    that leads closest to the goal.
+    """
+    def __init__(self, graph, goal):
+        self.graph = graph
+        self.goal = goal
+        self.cluster = graph.cluster_of[goal]
+        self.settled = {}  # Entrance id -> walking distance to the goal
+        self.allowance = None  # Entrances the current query may still settle, None for no limit
+        self.heap = [(length, entrance) for entrance, length
+                     in graph._distances_in_cluster(goal, self.cluster, graph.entrances.get(self.cluster, []))]
+        if goal in graph.links:
+            self.heap.append((0, goal))
+        heapq.heapify(self.heap)
+
+    def distance(self, entrance):
+        """
+        Walking distance from an entrance to the goal, or None if the goal can't be reached from it.
+        Returns PENDING instead if settling it would take more than the allowance left by next_path.
+        """
+        graph, settled, heap = self.graph, self.settled, self.heap
+        while entrance not in settled and heap:
+            if self.allowance is not None:
+                if self.allowance <= 0:
+                    return PENDING
+                self.allowance -= 1
+            length, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled[node] = length
+            for other, steps in graph.cluster_edges(graph.cluster_of[node]).get(node, ()):
+                if other not in settled:
+                    heapq.heappush(heap, (length + steps, other))
+            for other in graph.links[node]:
+                if other not in settled:
+                    heapq.heappush(heap, (length + 1, other))
+        return settled.get(entrance)
+
+    def next_path(self, start, goal, max_settle=None):
+        """
+        Cell ids to walk from `start` towards `goal` (a cell of this field's cluster): straight to
+        it inside the goal's cluster, otherwise to the best exit of the current cluster and one
+        step across it. Returns None if the goal can't be reached.
+
+        A far query on a fresh field can expand most of the graph. With `max_settle` the shared
+        search advances by at most that many entrances and PENDING is returned if it has not
+        reached this far yet, so the expansion is spread over the queries of several ticks.
+        The answer, once given, is the same either way.
+
+        The field is kept while the goal moves around inside its cluster (see get_goal_field), so
+        routes from other clusters lead to where the goal was when the field was built, at most
+        GOAL_DRIFT cells from `goal`; they still arrive in the right cluster, and the last leg in
+        the goal's cluster always walks to `goal` itself.
+        """
+        graph = self.graph
+        cluster = graph.cluster_of[start]
+        if cluster == self.cluster:
+            path = graph.local_path(start, goal)
+            if path is not None:
+                return path
+
+        self.allowance = max_settle
+        try:
+            exit_step = self._best_exit(start, cluster)
+        finally:
+            self.allowance = None
+        if exit_step is None or exit_step is PENDING:
+            return exit_step
+        parents, entrance, other = exit_step
+        return graph._walk_back(parents, start, entrance) + [other]
+
+    def _best_exit(self, start, cluster):
+        """(parents, exit entrance, entrance across) on the shortest way out of `cluster` towards the goal."""
+        graph = self.graph
+        parents = graph._search_cluster(start, cluster)
+        best, best_length = None, None
+        for entrance in graph.entrances.get(cluster, ()):
+            if entrance not in parents:
+                continue
+            local = graph._path_length(parents, start, entrance)
+            for other in graph.links[entrance]:
+                remaining = self.distance(other)
+                if remaining is PENDING:
+                    return PENDING
+                if remaining is not None and (best_length is None or local + 1 + remaining < best_length):
+                    best, best_length = (parents, entrance, other), local + 1 + remaining
+        return best
+
+
+_cluster_graphs = weakref.WeakKeyDictionary()
+_goal_fields = weakref.WeakKeyDictionary()
+
+def get_cluster_graph(maze):
+    """Return the cluster graph shared by all ghosts on this maze, building it on first use."""
+    graph = _cluster_graphs.get(maze)
+    if graph is None:
+        graph = ClusterGraph(maze.grid)
+        _cluster_graphs[maze] = graph
+    return graph
+
+
+def get_goal_field(maze, goal):
+    """
+    The GoalField for a goal cell id. Rebuilding it means expanding the entrance graph again,
+    so it is kept until the goal moves into another cluster or more than GOAL_DRIFT cells away.
+    """
+    graph = get_cluster_graph(maze)
+    field = _goal_fields.get(maze)
+    if (field is None or field.cluster != graph.cluster_of[goal]
+            or _drift(graph.grid, field.goal, goal) > GOAL_DRIFT):
+        field = GoalField(graph, goal)
+        _goal_fields[maze] = field
+    return field
+
+
+def _drift(grid, before, after):
+    (col, row), (new_col, new_row) = grid.cell_of(before), grid.cell_of(after)
+    return abs(new_col - col) + abs(new_row - row)
+
+
+def uses_hierarchy(maze):
+    """True if ghosts on this maze should plan with the cluster graph instead of a full distance field."""
+    return len(maze.grid) >= HIERARCHICAL_MIN_CELLS
@@ -0,0 +1,63 @@
+import struct
+
+# One byte per input; 0 means no key held
+DIRECTION_CODES = {None: 0, "left": 1, "right": 2, "up": 3, "down": 4}
+CODE_DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+class InputLog:
+    """
+    Compact per-tick input recording. Together with the session seed and setup it
+    reproduces a game exactly. Inputs are stored run-length encoded as
+    (direction code, run length) byte pairs, since held keys repeat for many ticks.
+    """
+    MAGIC = b"PACREC1\0"
+    HEADER = struct.Struct("<8sQHBI")  # magic, seed, ghost count, swarm flag, tick count
+
+    def __init__(self, seed, ghost_count=4, swarm=False):
+        self.seed = seed
+        self.ghost_count = ghost_count
+        self.swarm = swarm
+        self.runs = bytearray()  # code, length, code, length, ...
+        self.ticks = 0
+
+    def record(self, direction):
+        """Append the input used for one tick."""
+        code = DIRECTION_CODES[direction]
+        if self.runs and self.runs[-2] == code and self.runs[-1] < 255:
+            self.runs[-1] += 1
+        else:
+            self.runs += bytes((code, 1))
+        self.ticks += 1
+
+    def __iter__(self):
+        """Yield the input of every recorded tick, in order."""
+        runs = self.runs
+        for index in range(0, len(runs), 2):
+            direction = CODE_DIRECTIONS[runs[index]]
+            for _ in range(runs[index + 1]):
+                yield direction
+
+    def __len__(self):
+        return self.ticks
+
+    def to_bytes(self):
+        return self.HEADER.pack(self.MAGIC, self.seed, self.ghost_count, int(self.swarm), self.ticks) + bytes(self.runs)
+
+    @staticmethod
+    def from_bytes(data):
+        magic, seed, ghost_count, swarm, ticks = InputLog.HEADER.unpack_from(data)
+        if magic != InputLog.MAGIC:
+            raise ValueError("Not a PAAAC-MAN input recording")
+        log = InputLog(seed, ghost_count, bool(swarm))
+        log.runs = bytearray(data[InputLog.HEADER.size:])
+        log.ticks = ticks
+        return log
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as file:
+            return InputLog.from_bytes(file.read())
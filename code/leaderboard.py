@@ -0,0 +1,122 @@
+import bisect
+import heapq
+
+class _ScoreCounts:
+    """
+    Fenwick (binary indexed) tree counting how many users have each best score, so
+    "how many users scored above X" takes O(log d) for d distinct scores. The tree is
+    indexed by position in the sorted distinct scores rather than by score, so one huge
+    score costs one slot. A score not seen before is inserted with bisect and the tree is
+    rebuilt in O(d) on the next query, so loading many records rebuilds it once.
+    """
+    def __init__(self):
+        self.scores = []  # Distinct scores ever added, ascending
+        self.counts = {}  # score -> users whose best score it is
+        self.tree = [0]
+        self.stale = False  # A new score was inserted since the tree was built
+        self.total = 0
+
+    def add(self, score, delta):
+        self.total += delta
+        count = self.counts.get(score)
+        if count is None:
+            bisect.insort(self.scores, score)
+            self.counts[score] = delta
+            self.stale = True
+            return
+        self.counts[score] = count + delta
+        if not self.stale:
+            tree = self.tree
+            index = bisect.bisect_left(self.scores, score) + 1
+            while index < len(tree):
+                tree[index] += delta
+                index += index & -index
+
+    def count_at_most(self, score):
+        """Number of users whose best score is <= score."""
+        if self.stale:
+            self._rebuild()
+        tree = self.tree
+        index = bisect.bisect_right(self.scores, score)
+        count = 0
+        while index > 0:
+            count += tree[index]
+            index -= index & -index
+        return count
+
+    def count_above(self, score):
+        return self.total - self.count_at_most(score)
+
+    def _rebuild(self):
+        size = len(self.scores)
+        tree = [0] * (size + 1)
+        for index, score in enumerate(self.scores, 1):
+            tree[index] += self.counts[score]
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.tree = tree
+        self.stale = False
+
+
+class Leaderboard:
+    """
+    Best score per user with a bounded top-K heap and O(log n) rank queries.
+    Scores only ever improve, so a user can leave the top K only by being pushed out.
+    """
+    def __init__(self, k=5):
+        self.k = k
+        self.best = {}  # username -> best score
+        self.counts = _ScoreCounts()
+        self.top = []  # Min-heap of (score, username), at most k entries
+        self.in_top = set()
+
+    @staticmethod
+    def from_records(records, k=5):
+        """Build a leaderboard from any iterable of (username, score), consumed one record at a time."""
+        leaderboard = Leaderboard(k)
+        for username, score in records:
+            leaderboard.submit(username, score)
+        return leaderboard
+
+    def submit(self, username, score):
+        """Record a score; returns True if it is the user's new best. Negative scores are ignored."""
+        if score < 0:
+            return False
+        old = self.best.get(username)
+        if old is not None and score <= old:
+            return False
+        self.best[username] = score
+        if old is not None:
+            self.counts.add(old, -1)
+        self.counts.add(score, 1)
+
+        if username in self.in_top:
+            self.top = [(score if name == username else s, name) for s, name in self.top]
+            heapq.heapify(self.top)
+        elif len(self.top) < self.k:
+            heapq.heappush(self.top, (score, username))
+            self.in_top.add(username)
+        elif (score, username) > self.top[0]:
+            _, dropped = heapq.heapreplace(self.top, (score, username))
+            self.in_top.discard(dropped)
+            self.in_top.add(username)
+        return True
+
+    def best_score(self, username):
+        """The user's best score, or None if they have never scored."""
+        return self.best.get(username)
+
+    def rank(self, username):
+        """1-based rank of a user (ties share a rank), or None if they have never scored."""
+        score = self.best.get(username)
+        if score is None:
+            return None
+        return self.counts.count_above(score) + 1
+
+    def top_scores(self):
+        """The top K as (username, score), best first."""
+        return [(name, score) for score, name in sorted(self.top, reverse=True)]
+
+    def __len__(self):
+        return len(self.best)
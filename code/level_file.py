@@ -0,0 +1,142 @@
+import mmap
+import struct
+import sys
+from array import array
+from maze_grid import MazeGrid
+from MovementStrategy import DistanceField
+
+# Compiled level file:
+#   header, then a table of (tag, offset, length) section entries, then the sections.
+#   Every section starts on an 8 byte boundary and integer sections are little-endian int32,
+#   so a memory map of the file can be used as the grid's arrays without copying.
+MAGIC = b"PACLVL1\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIII")  # magic, version, reserved, cols, rows, section count
+SECTION = struct.Struct("<4sQQ")  # tag, offset, length in bytes
+ALIGN = 8
+
+CODE_TAGS = {0: b"CEL0", 2: b"CEL2", 3: b"CEL3", 4: b"CEL4"}  # Cell indexes for each non-wall code
+REQUIRED_TAGS = (b"CELL", b"IDS ", b"IDCL", b"NBST", b"NBRS", b"WALL", b"PELL")
+
+
+def _ints(values):
+    data = array("i", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def compile_level(maze, distance_sources=()):
+    """
+    Serialize a maze into the level format: cells, walkable ids, CSR adjacency, merged wall
+    geometry, the pellet template, the per-code cell indexes and a distance table from every
+    (col, row) in `distance_sources`.
+    """
+    grid, cell_size = maze.grid, maze.cell_size
+    walls = [value // cell_size for wall in maze.merged_walls() for value in wall]
+    sections = [
+        (b"CELL", bytes(grid.cells)),
+        (b"IDS ", _ints(grid.ids)),
+        (b"IDCL", _ints(grid.id_cells)),
+        (b"NBST", _ints(grid.neighbor_start)),
+        (b"NBRS", _ints(grid.neighbors)),
+        (b"WALL", _ints(walls)),
+        (b"PELL", bytes(maze.pellets.template)),
+    ]
+    sections += [(tag, _ints(grid.cells_by_code[code])) for code, tag in CODE_TAGS.items() if code in grid.cells_by_code]
+
+    sources = [cell for cell in dict.fromkeys(distance_sources) if grid.id_at(*cell) >= 0]
+    if sources:
+        field = DistanceField(maze)
+        tables = array("i")
+        for cell in sources:
+            field.update(cell)
+            tables += field.distances
+        sections += [(b"DSRC", _ints(grid.id_at(*cell) for cell in sources)), (b"DIST", _ints(tables))]
+
+    start = HEADER.size + SECTION.size * len(sections)
+    table, body = [], bytearray()
+    for tag, data in sections:
+        body += bytes(-(start + len(body)) % ALIGN)
+        table.append(SECTION.pack(tag, start + len(body), len(data)))
+        body += data
+    return HEADER.pack(MAGIC, VERSION, 0, grid.cols, grid.rows, len(sections)) + b"".join(table) + bytes(body)
+
+
+def save_level(maze, path, distance_sources=()):
+    with open(path, "wb") as file:
+        file.write(compile_level(maze, distance_sources))
+
+
+def load_level(path, cell_size=25):
+    """
+    Open a compiled level as a MazeGrid. The file is memory-mapped read-only and the grid's
+    arrays are views into the map, so opening is O(1) in the maze size, pages load on demand
+    and processes opening the same file share one copy through the page cache.
+    """
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is truncated or corrupt")
+    magic, version, _, cols, rows, count = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a compiled PAAAC-MAN level")
+    if version != VERSION:
+        raise ValueError(f"{path} is level format version {version}, expected {VERSION}")
+
+    if HEADER.size + count * SECTION.size > len(view):
+        raise ValueError(f"{path} is truncated or corrupt")
+    sections = {}
+    for index in range(count):
+        tag, offset, length = SECTION.unpack_from(view, HEADER.size + index * SECTION.size)
+        if offset + length > len(view):
+            raise ValueError(f"{path} is truncated or corrupt")
+        sections[tag] = view[offset:offset + length]
+    missing = [tag.decode().strip() for tag in REQUIRED_TAGS if tag not in sections]
+    if b"DSRC" in sections and b"DIST" not in sections:
+        missing.append("DIST")
+    if missing:
+        raise ValueError(f"{path} is truncated or corrupt: no {', '.join(missing)} section")
+
+    def ints(tag):
+        data = sections[tag]
+        if len(data) % 4:
+            raise ValueError(f"{path} is truncated or corrupt: {tag.decode().strip()} is not whole int32s")
+        if sys.byteorder == "little":
+            return data.cast("i")
+        copy = array("i")  # Big-endian hosts pay for a swapped copy
+        copy.frombytes(data)
+        copy.byteswap()
+        return copy
+
+    def check_length(tag, data, expected):
+        if len(data) != expected:
+            raise ValueError(f"{path} is truncated or corrupt: {tag.decode().strip()} has {len(data)} "
+                             f"entries, expected {expected}")
+        return data
+
+    # Section lengths are checked against each other here, so a damaged file fails to open
+    # rather than with an IndexError part way through a game
+    cells = check_length(b"CELL", sections[b"CELL"], rows * cols)
+    ids = check_length(b"IDS ", ints(b"IDS "), rows * cols)
+    id_cells = ints(b"IDCL")
+    neighbor_start = check_length(b"NBST", ints(b"NBST"), len(id_cells) + 1)
+    neighbors = check_length(b"NBRS", ints(b"NBRS"), neighbor_start[-1])
+    pellet_cells = check_length(b"PELL", sections[b"PELL"], rows * cols)
+    walls = ints(b"WALL")
+    if len(walls) % 4:
+        raise ValueError(f"{path} is truncated or corrupt: WALL is not whole rects")
+
+    grid = MazeGrid.from_arrays(rows, cols, cell_size, cells, ids, id_cells,
+                                {code: ints(tag) for code, tag in CODE_TAGS.items() if tag in sections},
+                                neighbor_start, neighbors)
+    grid.wall_rects = walls
+    grid.pellet_cells = pellet_cells
+    if b"DSRC" in sections:
+        sources, size = ints(b"DSRC"), len(grid)
+        tables = check_length(b"DIST", ints(b"DIST"), len(sources) * size)
+        for index, cell_id in enumerate(sources):
+            grid.distance_tables[cell_id] = tables[index * size:(index + 1) * size]
+    grid.mapping = mapping  # Keeps the map open for as long as the grid lives
+    return grid
@@ -1,17 +1,14 @@
-import pygame
+from pellet_store import PelletStore, NO_PELLET, SUPER_PELLET
+from maze_grid import MazeGrid
 
 class Maze:
-    def __init__(self, screen_width=800, screen_height=600, cell_size=25):
+    def __init__(self, screen_width=800, screen_height=600, cell_size=25, layout=None):
         self.cell_size = cell_size
-        self.cols = screen_width // cell_size  # Should be 32 for an 800-pixel width
-        self.rows = screen_height // cell_size  # Should be 24 for a 600-pixel height
-        
-        self.walls = []
-        self.pellets = []
+        self.pellets = None
 
         # Define a more complex layout that exactly fits 32 columns and 24 rows
         # This layout will fully occupy the screen dimensions
-        self.layout = [
+        default_layout = [
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
             [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 1],
             [1, 0, 1, 1, 0, 1, 1, 0, 1, 1, 1, 0, 1, 1, 1, 0, 1, 0, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1, 0, 1, 0, 1],
@@ -37,31 +34,87 @@ class Maze:
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
         ]
 
+        # Any rectangular grid using the same cell codes can replace the built-in level.
+        # It is compiled into flat arrays that collisions, movement and pathfinding all read;
+        # a MazeGrid (e.g. from level_file.load_level) is used as it is.
+        if isinstance(layout, MazeGrid):
+            if layout.cell_size != cell_size:
+                raise ValueError(f"Grid was built for {layout.cell_size}px cells, not {cell_size}px")
+            self.grid = layout
+        else:
+            self.grid = MazeGrid(layout if layout is not None else default_layout, cell_size)
+        self.rows, self.cols = self.grid.rows, self.grid.cols
 
+        self.generate_maze()  # Generate pellets based on layout
 
-        self.generate_maze()  # Generate walls and pellets based on layout
+    @property
+    def layout(self):
+        """
+        The maze as rows of cell codes, rebuilt from the grid on every access.
+        Meant for tools and level building; game code reads `grid` instead.
+        """
+        return self.grid.to_layout()
 
     def generate_maze(self):
         """
-        Generate walls and pellets based on the layout.
-        """
-        self.pellets.clear()
-        self.walls.clear()
-        for row_idx, row in enumerate(self.layout):
-            for col_idx, cell in enumerate(row):
-                x = col_idx * self.cell_size
-                y = row_idx * self.cell_size
-
-                if cell == 1:  # Wall
-                    self.walls.append(pygame.Rect(x, y, self.cell_size, self.cell_size))
-                elif cell == 0:  # Pathway with normal pellet
-                    pellet_x = x + self.cell_size // 2
-                    pellet_y = y + self.cell_size // 2
-                    self.pellets.append((pellet_x, pellet_y))
-                elif cell == 2: # Super-pellet
-                    pellet_x = x + self.cell_size // 2
-                    pellet_y = y + self.cell_size // 2
-                    self.pellets.append((pellet_x, pellet_y))
+        Generate pellets based on the layout. Walls are read straight from the grid.
+        """
+        # Normal (0) and super (2) pellets live in a cell-indexed store
+        self.pellets = PelletStore(self.grid, self.cell_size)
+
+    def merged_walls(self, cells=None):
+        """
+        Return the walls as few rects as possible: horizontal runs of wall tiles in each row,
+        stacked into taller rects where the same run repeats in the rows below.
+        `cells` limits the result to a (first_col, first_row, last_col, last_row) block.
+        """
+        import pygame  # Only drawing and wall rects need it, so importing the maze stays cheap
+        cols = self.grid.cols
+        if cells is None and self.grid.wall_rects is not None:
+            # Compiled levels store the whole maze's merged walls in cells
+            quads, size = self.grid.wall_rects, self.cell_size
+            return [pygame.Rect(quads[index] * size, quads[index + 1] * size, quads[index + 2] * size, quads[index + 3] * size)
+                    for index in range(0, len(quads), 4)]
+        first_col, first_row, last_col, last_row = cells if cells else (0, 0, cols - 1, self.grid.rows - 1)
+        merged = []
+        open_runs = {}  # (first_col, last_col) -> rect still growing downwards
+        for row_idx in range(first_row, last_row + 1):
+            row = self.grid.cells[row_idx * cols:(row_idx + 1) * cols]
+            runs = []
+            col_idx = first_col
+            while col_idx <= last_col:
+                if row[col_idx] == 1:
+                    start = col_idx
+                    while col_idx <= last_col and row[col_idx] == 1:
+                        col_idx += 1
+                    runs.append((start, col_idx - 1))
+                else:
+                    col_idx += 1
+
+            next_runs = {}
+            for run in runs:
+                rect = open_runs.pop(run, None)
+                if rect is None:
+                    rect = pygame.Rect(run[0] * self.cell_size, row_idx * self.cell_size,
+                                       (run[1] - run[0] + 1) * self.cell_size, 0)
+                    merged.append(rect)
+                rect.height += self.cell_size
+                next_runs[run] = rect
+            open_runs = next_runs
+        return merged
+
+    def reset_pellets(self):
+        """
+        Put every pellet back for a new level without rebuilding the walls.
+        """
+        self.pellets.reset()
+
+    def collides_with_wall(self, rect):
+        """
+        Check whether a rect overlaps a wall by looking only at the layout tiles it covers,
+        so the cost does not depend on how many walls the maze has.
+        """
+        return self.grid.collides_with_wall(rect)
 
     def get_layout(self):
         """
@@ -69,21 +122,51 @@ class Maze:
         """
         return self.layout
 
-    def draw(self, screen):
+    def pixel_size(self):
+        """Width and height of the whole maze in pixels."""
+        return self.grid.cols * self.cell_size, self.grid.rows * self.cell_size
+
+    def cells_in(self, rect):
+        """The (first_col, first_row, last_col, last_row) block of cells a pixel rect covers, or None."""
+        first_col = max(rect.left // self.cell_size, 0)
+        last_col = min((rect.right - 1) // self.cell_size, self.grid.cols - 1)
+        first_row = max(rect.top // self.cell_size, 0)
+        last_row = min((rect.bottom - 1) // self.cell_size, self.grid.rows - 1)
+        if first_col > last_col or first_row > last_row:
+            return None
+        return first_col, first_row, last_col, last_row
+
+    def draw(self, screen, view=None):
         """
         Draw the maze onto the provided screen, including walls, normal pellets, and super-pellets.
+        With a `view` rect (in maze pixels) only the cells inside it are drawn, shifted so the
+        view's top-left lands on the screen's top-left.
         """
+        import pygame
+        if view is None:
+            cells, offset_x, offset_y = None, 0, 0
+            pellets = self.pellets.remaining()
+        else:
+            cells, offset_x, offset_y = self.cells_in(view), -view.x, -view.y
+            if cells is None:
+                return
+            first_col, first_row, last_col, last_row = cells
+            kind_at = self.pellets.kind_at
+            pellets = ((col_idx, row_idx, kind_at(col_idx, row_idx))
+                       for row_idx in range(first_row, last_row + 1)
+                       for col_idx in range(first_col, last_col + 1))
+
         # Draw all walls
-        for wall in self.walls:
-            pygame.draw.rect(screen, (0, 0, 255), wall)  # Blue walls
+        for wall in self.merged_walls(cells):
+            pygame.draw.rect(screen, (0, 0, 255), wall.move(offset_x, offset_y))  # Blue walls
 
         # Draw all pellets
-        for pellet in self.pellets:
-            # Check if the pellet is a super-pellet (layout value = 2)
-            col_idx = (pellet[0] - self.cell_size // 2) // self.cell_size
-            row_idx = (pellet[1] - self.cell_size // 2) // self.cell_size
-
-            if self.layout[row_idx][col_idx] == 2:
+        for col_idx, row_idx, kind in pellets:
+            if kind == NO_PELLET:
+                continue
+            x, y = self.pellets.position(col_idx, row_idx)
+            pellet = (x + offset_x, y + offset_y)
+            if kind == SUPER_PELLET:
                 # Draw a super-pellet (larger and distinct color)
                 pygame.draw.circle(screen, (255, 0, 0), pellet, 8)  # Red, larger pellet
             else:
@@ -95,4 +178,28 @@ class Maze:
         """
         Check if all pellets have been collected.
         """
-        return len(self.pellets) == 0
+        return self.pellets.all_collected()
+
+
+def tiled_layout(tiles_x, tiles_y, base=None):
+    """
+    A bigger maze made of copies of a level (the built-in one by default), with holes knocked
+    through the shared border walls wherever both sides are open so the copies form one maze.
+    """
+    base = base if base else Maze().layout
+    rows, cols = len(base), len(base[0])
+    layout = [[base[row % rows][col % cols] for col in range(cols * tiles_x)] for row in range(rows * tiles_y)]
+
+    side_rows = [row for row in range(1, rows - 1) if base[row][cols - 2] != 1 and base[row][1] != 1]
+    side_cols = [col for col in range(1, cols - 1) if base[rows - 2][col] != 1 and base[1][col] != 1]
+    for tile_y in range(tiles_y):
+        for tile_x in range(tiles_x):
+            if tile_x + 1 < tiles_x:
+                for row in side_rows:
+                    layout[tile_y * rows + row][(tile_x + 1) * cols - 1] = 0
+                    layout[tile_y * rows + row][(tile_x + 1) * cols] = 0
+            if tile_y + 1 < tiles_y:
+                for col in side_cols:
+                    layout[(tile_y + 1) * rows - 1][tile_x * cols + col] = 0
+                    layout[(tile_y + 1) * rows][tile_x * cols + col] = 0
+    return layout
@@ -0,0 +1,145 @@
+from array import array
+
+# Cell codes used in maze layouts
+EMPTY = 0  # Corridor with a pellet
+WALL = 1
+SUPER = 2  # Corridor with a super pellet
+JAIL = 3
+JAIL_EXIT = 4
+
+# Neighbour order (left, right, up, down); pathfinding tie-breaks depend on it
+NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class MazeGrid:
+    """
+    A layout compiled once into flat arrays that every subsystem reads:
+
+    - `cells`: one byte per cell, row-major, holding the cell code.
+    - `ids`: the walkable id of every cell (-1 for walls), so per-cell data for
+      pathfinding can live in dense arrays with no room wasted on walls.
+    - `neighbor_start` / `neighbors`: CSR adjacency. The walkable neighbours of id `i`
+      are neighbors[neighbor_start[i]:neighbor_start[i + 1]], in NEIGHBOR_OFFSETS order.
+
+    A grid loaded from a compiled level file (see level_file.py) holds read-only views of
+    the file's memory map instead, plus the precomputed walls, pellets and distance tables.
+    """
+    def __init__(self, layout, cell_size):
+        self.rows = len(layout)
+        self.cols = len(layout[0])
+        self.cell_size = cell_size
+        self.cells = bytearray(code for row in layout for code in row)
+        if len(self.cells) != self.rows * self.cols:
+            raise ValueError("Maze layout rows must all have the same length")
+
+        self.ids = array("i", [-1]) * len(self.cells)
+        self.id_cells = array("i")  # Walkable id -> flat cell index
+        # Row-major cell indexes for each cell code except walls, e.g. spawn points and the jail
+        self.cells_by_code = {}
+        for index, code in enumerate(self.cells):
+            if code != WALL:
+                self.ids[index] = len(self.id_cells)
+                self.id_cells.append(index)
+                self.cells_by_code.setdefault(code, array("i")).append(index)
+
+        cols, last_col, ids = self.cols, self.cols - 1, self.ids
+        size = len(ids)
+        self.neighbor_start = array("i", [0])
+        self.neighbors = array("i")
+        for index in self.id_cells:
+            col = index % cols
+            # Same order as NEIGHBOR_OFFSETS: left, right, up, down
+            if col > 0 and ids[index - 1] >= 0:
+                self.neighbors.append(ids[index - 1])
+            if col < last_col and ids[index + 1] >= 0:
+                self.neighbors.append(ids[index + 1])
+            if index >= cols and ids[index - cols] >= 0:
+                self.neighbors.append(ids[index - cols])
+            if index + cols < size and ids[index + cols] >= 0:
+                self.neighbors.append(ids[index + cols])
+            self.neighbor_start.append(len(self.neighbors))
+
+        self.wall_rects = None  # Merged walls as flat (col, row, width, height) cell quads, if precomputed
+        self.pellet_cells = None  # Pellet template, if precomputed
+        self.distance_tables = {}  # Source walkable id -> distances from it, if precomputed
+
+    @staticmethod
+    def from_arrays(rows, cols, cell_size, cells, ids, id_cells, cells_by_code, neighbor_start, neighbors):
+        """Build a grid from already compiled arrays (or buffer views of them) without recompiling."""
+        grid = MazeGrid.__new__(MazeGrid)
+        grid.rows, grid.cols, grid.cell_size = rows, cols, cell_size
+        grid.cells, grid.ids, grid.id_cells = cells, ids, id_cells
+        grid.cells_by_code = cells_by_code
+        grid.neighbor_start, grid.neighbors = neighbor_start, neighbors
+        grid.wall_rects = None
+        grid.pellet_cells = None
+        grid.distance_tables = {}
+        return grid
+
+    def __len__(self):
+        """Number of walkable cells."""
+        return len(self.id_cells)
+
+    def code(self, col, row):
+        """Cell code at (col, row); outside the maze counts as wall."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.cells[row * self.cols + col]
+        return WALL
+
+    def id_at(self, col, row):
+        """Walkable id of (col, row), or -1 for walls and cells outside the maze."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.ids[row * self.cols + col]
+        return -1
+
+    def cell_of(self, cell_id):
+        """(col, row) of a walkable id."""
+        return divmod(self.id_cells[cell_id], self.cols)[::-1]
+
+    def neighbors_of(self, cell_id):
+        return self.neighbors[self.neighbor_start[cell_id]:self.neighbor_start[cell_id + 1]]
+
+    def degree(self, cell_id):
+        return self.neighbor_start[cell_id + 1] - self.neighbor_start[cell_id]
+
+    def first_cell_with(self, code):
+        """(col, row) of the first cell with `code` in row-major order, or None."""
+        indexes = self.cells_by_code.get(code)
+        return (indexes[0] % self.cols, indexes[0] // self.cols) if indexes else None
+
+    def last_cell_with(self, code):
+        indexes = self.cells_by_code.get(code)
+        return (indexes[-1] % self.cols, indexes[-1] // self.cols) if indexes else None
+
+    def collides_with_wall(self, rect):
+        """True if a pixel rect overlaps a wall tile; only the tiles under the rect are read."""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        cell_size, cols, cells = self.cell_size, self.cols, self.cells
+        first_col, last_col = rect.left // cell_size, (rect.right - 1) // cell_size
+        first_row, last_row = rect.top // cell_size, (rect.bottom - 1) // cell_size
+
+        # Players and ghosts are one cell big, so they cover at most 2x2 tiles: test those directly
+        if last_col - first_col <= 1 and last_row - first_row <= 1 and first_col >= 0 and first_row >= 0 \
+                and last_col < cols and last_row < self.rows:
+            top, bottom = first_row * cols, last_row * cols
+            return (cells[top + first_col] == WALL or cells[top + last_col] == WALL
+                    or cells[bottom + first_col] == WALL or cells[bottom + last_col] == WALL)
+
+        for row_idx in range(max(first_row, 0), min(last_row, self.rows - 1) + 1):
+            start = row_idx * cols
+            for index in range(start + max(first_col, 0), start + min(last_col, cols - 1) + 1):
+                if cells[index] == WALL:
+                    return True
+        return False
+
+    def pellet_template(self, pellet_for_code):
+        """One byte per cell mapped through `pellet_for_code`, unless the level file already holds it."""
+        if self.pellet_cells is not None:
+            return bytes(self.pellet_cells)
+        return bytes(self.cells).translate(pellet_for_code)
+
+    def to_layout(self):
+        """The grid as a list of rows of codes (a fresh copy, for tools and level editing)."""
+        cols = self.cols
+        return [list(self.cells[row * cols:(row + 1) * cols]) for row in range(self.rows)]
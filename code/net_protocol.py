@@ -0,0 +1,294 @@
+# NETWORK PROTOCOL
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+# Client -> server messages, each starting with its one-byte type
+JOIN = b"J"  # JOIN + role + room name (UTF-8)
+INPUT = b"I"  # INPUT + direction code (input_log.DIRECTION_CODES), held until the next INPUT
+
+# Server -> client messages
+WELCOME = b"W"  # WELCOME + granted role + WELCOME_HEADER + zlib(maze cell codes)
+KEYFRAME = b"K"  # KEYFRAME + zlib(STATE_HEADER + positions + pellet kinds)
+DELTA = b"D"  # DELTA + STATE_HEADER + DELTA_COUNTS + MOVE entries + eaten pellet cells (uint32)
+
+PLAYER = b"p"
+SPECTATOR = b"s"
+
+STATES = ("playing", "life_lost", "level_complete", "paused", "game_over")
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+WELCOME_HEADER = struct.Struct("<HHH")  # cols, rows, cell size
+STATE_HEADER = struct.Struct("<IBHBIBH")  # tick, state, level, lives, score, super mode, ghost count
+DELTA_COUNTS = struct.Struct("<HII")  # moved entities, eaten pellets, checksum of the state after the delta
+MOVE = struct.Struct("<Hii")  # entity (0 is the player, ghost i is i + 1), new top-left x, y
+LENGTH = struct.Struct("<I")
+MAX_MESSAGE = 1 << 24  # Longer messages are refused rather than buffered
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _little_endian(values):
+    """Bytes of an array in little-endian order, the byte order used on the wire."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _checked_length(length):
+    if length > MAX_MESSAGE:
+        raise ValueError(f"Message of {length} bytes is over the {MAX_MESSAGE} byte limit")
+    return length
+
+
+class WorldSnapshot:
+    """
+    What a client needs to show the game: the header fields, the top-left pixel position of
+    the player and of every ghost, and the pellet kind of every cell (as in PelletStore).
+    Servers build one per broadcast; clients keep theirs current from keyframes and deltas.
+    """
+    def __init__(self, tick=0, state="playing", level=1, lives=3, score=0, super_mode=False,
+                 positions=None, pellets=b""):
+        self.tick = tick
+        self.state = state
+        self.level = level
+        self.lives = lives
+        self.score = score
+        self.super_mode = super_mode
+        self.positions = positions if positions is not None else array("i", [0, 0])  # x, y of player, then ghosts
+        self.pellets = pellets
+
+    @staticmethod
+    def from_simulation(sim):
+        """Snapshot a GameSimulation. The pellets are the live store, not a copy."""
+        positions = array("i", sim.player.rect.topleft)
+        for ghost in sim.ghosts:
+            positions.extend(ghost.rect.topleft)
+        events = sim.event_manager
+        return WorldSnapshot(sim.frame_count, sim.state, events.current_level, events.player_lives,
+                             sim.score_manager.get_current_score(), events.super_mode_timer > 0,
+                             positions, sim.map.pellets.cells)
+
+    @property
+    def ghost_count(self):
+        return len(self.positions) // 2 - 1
+
+    def header(self):
+        return STATE_HEADER.pack(self.tick, STATE_CODES[self.state], self.level, self.lives, self.score,
+                                 self.super_mode, self.ghost_count)
+
+    def _read_header(self, data, offset=0):
+        (self.tick, state, self.level, self.lives, self.score, super_mode,
+         ghost_count) = STATE_HEADER.unpack_from(data, offset)
+        self.state, self.super_mode = STATES[state], bool(super_mode)
+        return ghost_count
+
+    def checksum(self):
+        """CRC-32 of the whole state, sent with each delta so clients can tell if they drifted."""
+        crc = zlib.crc32(self.header())
+        crc = zlib.crc32(_little_endian(self.positions), crc)
+        return zlib.crc32(self.pellets, crc)
+
+    def encode_keyframe(self):
+        return KEYFRAME + zlib.compress(self.header() + _little_endian(self.positions) + bytes(self.pellets))
+
+    @staticmethod
+    def decode_keyframe(payload):
+        data = zlib.decompress(payload[1:])
+        snapshot = WorldSnapshot()
+        ghost_count = snapshot._read_header(data)
+        end = STATE_HEADER.size + (ghost_count + 1) * 2 * 4
+        snapshot.positions = _from_little_endian("i", data[STATE_HEADER.size:end])
+        snapshot.pellets = bytearray(data[end:])
+        return snapshot
+
+    def encode_delta(self, previous, eaten):
+        """
+        The change from `previous` (an earlier snapshot of the same game) to this one:
+        entities whose position changed and the cells (row * cols + col) whose pellet was eaten.
+        """
+        moved = []
+        positions, before = self.positions, previous.positions
+        if positions != before:
+            known = len(before)
+            for index in range(0, len(positions), 2):
+                if index >= known or positions[index] != before[index] or positions[index + 1] != before[index + 1]:
+                    moved.append(MOVE.pack(index // 2, positions[index], positions[index + 1]))
+        return b"".join((DELTA, self.header(), DELTA_COUNTS.pack(len(moved), len(eaten), self.checksum()),
+                         *moved, _little_endian(array("I", eaten))))
+
+    def apply_delta(self, payload):
+        """Bring this snapshot up to date with a delta. Returns False if the result fails the checksum."""
+        offset = 1
+        ghost_count = self._read_header(payload, offset)
+        offset += STATE_HEADER.size
+        moved, eaten, checksum = DELTA_COUNTS.unpack_from(payload, offset)
+        offset += DELTA_COUNTS.size
+
+        positions = self.positions
+        size = (ghost_count + 1) * 2
+        if len(positions) < size:
+            positions.extend([0] * (size - len(positions)))  # Ghosts added for a new level
+        del positions[size:]
+        for entity, x, y in MOVE.iter_unpack(payload[offset:offset + moved * MOVE.size]):
+            positions[entity * 2] = x
+            positions[entity * 2 + 1] = y
+        offset += moved * MOVE.size
+
+        pellets = self.pellets
+        for cell in _from_little_endian("I", payload[offset:offset + eaten * 4]):
+            pellets[cell] = 0
+        return self.checksum() == checksum
+
+
+class TcpChannel:
+    """Messages over a plain TCP stream, each prefixed with its length (uint32, little-endian)."""
+    kind = "tcp"
+
+    def __init__(self, reader, writer, first_length=None):
+        self.reader = reader
+        self.writer = writer
+        self.first_length = first_length  # Length prefix already read while telling TCP from WebSocket
+
+    async def read(self):
+        """The next message. Raises asyncio.IncompleteReadError once the peer has gone."""
+        length = self.first_length or await self.reader.readexactly(LENGTH.size)
+        self.first_length = None
+        return await self.reader.readexactly(_checked_length(LENGTH.unpack(length)[0]))
+
+    @staticmethod
+    def frame(payload):
+        return LENGTH.pack(len(payload)) + payload
+
+    def send_framed(self, data):
+        """Queue a message already framed with `frame()`; one framing can be shared by many channels."""
+        self.writer.write(data)
+
+    def send(self, payload):
+        self.send_framed(self.frame(payload))
+
+    def buffered(self):
+        """Bytes queued for this peer that the socket has not taken yet."""
+        return self.writer.transport.get_write_buffer_size()
+
+    def close(self):
+        self.writer.close()
+
+
+class WebSocketChannel(TcpChannel):
+    """
+    Messages as binary WebSocket frames (RFC 6455), for browser clients. Only what the game
+    needs: unfragmented binary messages, ping and close. Clients mask their frames.
+    """
+    kind = "websocket"
+
+    def __init__(self, reader, writer, client=False):
+        super().__init__(reader, writer)
+        self.client = client
+
+    async def read(self):
+        reader = self.reader
+        while True:
+            first, second = await reader.readexactly(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", await reader.readexactly(8))[0]
+            mask = await reader.readexactly(4) if second & 0x80 else None
+            payload = await reader.readexactly(_checked_length(length))
+            if mask:
+                payload = self._mask(payload, mask)
+
+            if opcode == 0x8:  # Close
+                raise asyncio.IncompleteReadError(b"", None)
+            if opcode == 0x9:  # Ping
+                self.writer.write(self._frame(payload, 0xA, self.client))
+            elif opcode in (0x1, 0x2):
+                if not first & 0x80:
+                    raise ValueError("Fragmented WebSocket messages are not supported")
+                return payload
+
+    @staticmethod
+    def _mask(payload, mask):
+        length = len(payload)
+        key = (mask * (length // 4 + 1))[:length]
+        return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(length, "little")
+
+    @staticmethod
+    def _frame(payload, opcode=0x2, masked=False):
+        length = len(payload)
+        if length < 126:
+            header = bytes((0x80 | opcode, length | (0x80 if masked else 0)))
+        elif length < 1 << 16:
+            header = bytes((0x80 | opcode, 126 | (0x80 if masked else 0))) + struct.pack(">H", length)
+        else:
+            header = bytes((0x80 | opcode, 127 | (0x80 if masked else 0))) + struct.pack(">Q", length)
+        if masked:
+            mask = os.urandom(4)
+            return header + mask + WebSocketChannel._mask(payload, mask)
+        return header + payload
+
+    @staticmethod
+    def frame(payload):
+        return WebSocketChannel._frame(payload)
+
+    def send(self, payload):
+        self.writer.write(self._frame(payload, masked=self.client))
+
+    @staticmethod
+    def accept_key(key):
+        return base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest())
+
+
+async def accept_channel(reader, writer):
+    """
+    Server side of a new connection: a WebSocket upgrade request if it starts with "GET ",
+    otherwise the length prefix of the first TCP message.
+    """
+    first = await reader.readexactly(4)
+    if first != b"GET ":
+        return TcpChannel(reader, writer, first)
+
+    request = await reader.readuntil(b"\r\n\r\n")
+    headers = {}
+    for line in request.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip()
+    key = headers.get(b"sec-websocket-key")
+    if key is None:
+        writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+        raise ValueError("HTTP request without a WebSocket upgrade")
+    writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 b"Sec-WebSocket-Accept: " + WebSocketChannel.accept_key(key) + b"\r\n\r\n")
+    return WebSocketChannel(reader, writer)
+
+
+async def open_channel(host, port, websocket=False):
+    """Client side: connect to a game server over plain TCP or as a WebSocket."""
+    reader, writer = await asyncio.open_connection(host, port)
+    if not websocket:
+        return TcpChannel(reader, writer)
+
+    key = base64.b64encode(os.urandom(16))
+    writer.write(b"GET / HTTP/1.1\r\nHost: " + f"{host}:{port}".encode() + b"\r\nUpgrade: websocket\r\n"
+                 b"Connection: Upgrade\r\nSec-WebSocket-Key: " + key + b"\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    response = await reader.readuntil(b"\r\n\r\n")
+    if b" 101 " not in response.split(b"\r\n", 1)[0] or WebSocketChannel.accept_key(key) not in response:
+        writer.close()
+        raise ConnectionError("The server refused the WebSocket upgrade")
+    return WebSocketChannel(reader, writer, client=True)
@@ -1,4 +1,17 @@
 # OBSERVER PATTERN IMPLEMENTATION
+class Event:
+    """
+    Base class for typed event records. Subclasses declare their fields in __slots__
+    and a `type` string that older string-based observers still receive.
+    """
+    __slots__ = ()
+    type = None
+
+    def data(self):
+        """The event's fields as the dict payload used by update(event_type, data)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
 class Observer:
     def update(self, event_type, data):
         """
@@ -8,6 +21,13 @@ class Observer:
         """
         raise NotImplementedError("Observer subclasses must implement the 'update' method.")
 
+    def handle_event(self, event):
+        """
+        React to a typed Event. By default this falls back to update(event_type, data);
+        observers on hot paths override it to dispatch on the event class instead.
+        """
+        self.update(event.type, event.data())
+
 class Subject:
     def __init__(self):
         self.observers = []
@@ -20,6 +40,11 @@ class Subject:
         """Unregister an observer."""
         self.observers.remove(observer)
 
+    def notify(self, event):
+        """Send a typed Event to all observers."""
+        for observer in self.observers:
+            observer.handle_event(event)
+
     def notify_observers(self, event_type, data):
         """Notify all observers of an event."""
         for observer in self.observers:
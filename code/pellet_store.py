@@ -0,0 +1,77 @@
+from maze_grid import EMPTY, SUPER
+
+NO_PELLET = 0
+NORMAL_PELLET = 1
+SUPER_PELLET = 2
+
+class PelletStore:
+    """
+    Pellets kept in a byte grid indexed by cell (row * cols + col), holding NO_PELLET,
+    NORMAL_PELLET or SUPER_PELLET. A template of the full level is built once so a reset
+    is a single buffer copy.
+    """
+    def __init__(self, grid, cell_size):
+        self.cell_size = cell_size
+        self.rows = grid.rows
+        self.cols = grid.cols
+
+        # Pathways (0) hold a normal pellet and super-pellet cells (2) a super pellet
+        pellet_for_code = bytearray(256)
+        pellet_for_code[EMPTY] = NORMAL_PELLET
+        pellet_for_code[SUPER] = SUPER_PELLET
+        self.template = grid.pellet_template(pellet_for_code)
+        self.template_count = self.rows * self.cols - self.template.count(NO_PELLET)
+
+        self.cells = bytearray(self.template)
+        self.count = self.template_count
+        self.eaten = []  # Cells eaten since the renderer last looked, as (col, row)
+        self.generation = 0  # Bumped on every reset so the renderer knows to repaint all pellets
+
+    def reset(self):
+        """Restore every pellet of the level from the template."""
+        self.cells[:] = self.template
+        self.count = self.template_count
+        self.eaten.clear()
+        self.generation += 1
+
+    def kind_at(self, col, row):
+        """Return the pellet kind in a cell (NO_PELLET if empty or out of bounds)."""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.cells[row * self.cols + col]
+        return NO_PELLET
+
+    def eat(self, col, row):
+        """Remove the pellet in a cell and return its kind (NO_PELLET if there was none)."""
+        kind = self.kind_at(col, row)
+        if kind:
+            self.cells[row * self.cols + col] = NO_PELLET
+            self.count -= 1
+            self.eaten.append((col, row))
+        return kind
+
+    def position(self, col, row):
+        """Pixel centre of a cell, which is where its pellet is drawn."""
+        return (col * self.cell_size + self.cell_size // 2, row * self.cell_size + self.cell_size // 2)
+
+    def remaining(self):
+        """Yield (col, row, kind) for every pellet still in the maze."""
+        if not self.count:
+            return
+        cols = self.cols
+        for index, kind in enumerate(self.cells):
+            if kind:
+                yield index % cols, index // cols, kind
+
+    def pop(self):
+        """Remove any one remaining pellet and return (col, row, kind), or None if the maze is empty."""
+        for col, row, kind in self.remaining():
+            self.eat(col, row)
+            return col, row, kind
+        return None
+
+    def __len__(self):
+        return self.count
+
+    def all_collected(self):
+        return self.count == 0
+
@@ -0,0 +1,108 @@
+# PATH PLANNING SCHEDULER
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Searches run per tick by a simulation's scheduler before the rest wait for later ticks
+PLAN_BUDGET = 16
+
+
+class PlanScheduler:
+    """
+    Spreads ghost path searches over ticks. Replans tend to come due together (a super
+    pellet turns every ghost scared at once, and their replan timers then stay in phase),
+    which used to put every search on the same frame.
+
+    Strategies submit a search and keep following their current path until its result is
+    ready. Each tick the first `budget` searches run as soon as they are submitted; the rest
+    queue up and run at the end of the tick, oldest first and `budget` at a time, so their
+    results are picked up on a later tick. The budget counts searches rather than time, so a
+    seeded game plays out the same on any machine.
+
+    With `use_thread()` the queued searches run on a worker thread while the frame is drawn
+    and the clock waits, instead of at the end of the tick. A ghost asking for a result that
+    is not ready waits for it, and a search run on submission first waits for the worker to
+    finish, since searches share lazily filled data (GoalField, ClusterGraph edges) without
+    locks. So searches never overlap and the game plays out exactly as without the thread.
+
+    The default budget of None runs every search on submission, for code that moves ghosts
+    without a simulation ticking the scheduler.
+    """
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.spent = 0  # Searches run against this tick's budget
+        self.queue = deque()  # (owner ref, search) waiting for a later tick
+        self.queued = weakref.WeakSet()  # Owners with a search in the queue
+        self.results = weakref.WeakKeyDictionary()  # Owner -> finished result, or a Future on the worker
+        self.executor = None
+        self.in_flight = []  # Futures handed to the worker and maybe still running
+
+    def use_thread(self):
+        """Run queued searches on a worker thread. One thread, so searches never run concurrently."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="path-planner")
+
+    def submit(self, owner, search):
+        """
+        Ask for `search()` (a callable that must not hold on to `owner`) to be run for `owner`,
+        typically a movement strategy. Its result is fetched with `result(owner)`.
+        """
+        if self.budget is None or (self.spent < self.budget and not self.queue):
+            self.spent += 1
+            self.wait_for_worker()
+            self.results[owner] = search()
+        else:
+            self.queue.append((weakref.ref(owner), search))
+            self.queued.add(owner)
+
+    def waiting(self, owner):
+        """True if a search for `owner` was submitted and its result not yet taken."""
+        return owner in self.results or owner in self.queued
+
+    def result(self, owner):
+        """Take the result of `owner`'s search, or None if it hasn't run yet."""
+        result = self.results.pop(owner, None)
+        if isinstance(result, Future):
+            result = result.result()  # Still on the worker thread
+        return result
+
+    def end_tick(self):
+        """Start the next tick's budget with queued searches, dropping those whose owner is gone."""
+        self.spent = 0
+        while self.queue and self.spent < self.budget:
+            ref, search = self.queue.popleft()
+            owner = ref()
+            if owner is None:
+                continue
+            self.queued.discard(owner)
+            self.spent += 1
+            if self.executor:
+                future = self.executor.submit(search)
+                self.in_flight.append(future)
+                self.results[owner] = future
+            else:
+                self.results[owner] = search()
+
+    def wait_for_worker(self):
+        """Block until every search handed to the worker thread has finished."""
+        for future in self.in_flight:
+            future.exception()  # Waits; errors surface when the owner takes the result
+        self.in_flight.clear()
+
+    def shutdown(self):
+        """Wait for the worker thread and stop it. Searches queued later run on the ticking thread."""
+        if self.executor is not None:
+            self.wait_for_worker()
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+_schedulers = weakref.WeakKeyDictionary()
+
+def get_plan_scheduler(maze):
+    """Return the scheduler for searches on this maze, creating an unbudgeted one on first use."""
+    scheduler = _schedulers.get(maze)
+    if scheduler is None:
+        scheduler = PlanScheduler()
+        _schedulers[maze] = scheduler
+    return scheduler
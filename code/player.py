@@ -1,47 +1,45 @@
-import pygame
 from observer_pattern import Subject
 from SuperPlayerDecorator import SuperPlayerDecorator
+from pellet_store import SUPER_PELLET
+from assets import AssetCache
+from maze_grid import EMPTY, JAIL
+from game_events import PelletCollected, SuperPelletCollected, PlayerCollidedWithGhost
 
 class Player(Subject):
     def __init__(self, cell_size, maze, start_position=None):
         super().__init__()
         if start_position is None:
-            # Find the first walkable cell in the maze (a cell with value 0)
-            for row_idx, row in enumerate(maze.get_layout()):
-                for col_idx, cell in enumerate(row):
-                    if cell == 0:  # Walkable pathway
-                        start_position = (col_idx * cell_size, row_idx * cell_size)
-                        break
-                if start_position:
-                    break
+            # Start on the first walkable cell in the maze (a cell with value 0)
+            col_idx, row_idx = maze.grid.first_cell_with(EMPTY)
+            start_position = (col_idx * cell_size, row_idx * cell_size)
 
         self.position = list(start_position)
         self.cell_size = cell_size
         self.speed = 5
+        self.super_mode_duration = 300  # Frames a super pellet lasts
         self.current_direction = None
         self.next_direction = None
 
-        try:
-            self.image = pygame.image.load(r"./resources/pacman.png")
-            self.image = pygame.transform.scale(self.image, (cell_size, cell_size))
-        except pygame.error:
-            self.image = pygame.Surface((cell_size, cell_size))
-            self.image.fill((255, 255, 0))
+        self.image = AssetCache.getInstance().get_sprite("pacman.png", (cell_size, cell_size), (255, 255, 0))
 
         self.rect = self.image.get_rect(center=(self.position[0] + self.cell_size // 2,
                                                  self.position[1] + self.cell_size // 2))
 
-    def update(self, maze, ghosts=None):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
+    def set_direction(self, direction):
+        """
+        Queue the next turn from an explicit input ("left", "right", "up", "down").
+        None means no new input this tick, so the current direction is kept.
+        """
+        if direction == "left":
             self.next_direction = (-self.speed, 0)
-        elif keys[pygame.K_RIGHT]:
+        elif direction == "right":
             self.next_direction = (self.speed, 0)
-        elif keys[pygame.K_UP]:
+        elif direction == "up":
             self.next_direction = (0, -self.speed)
-        elif keys[pygame.K_DOWN]:
+        elif direction == "down":
             self.next_direction = (0, self.speed)
 
+    def update(self, maze, ghosts=None, ghost_grid=None):
         sub_steps = self.speed
         for _ in range(sub_steps):
             if self.next_direction and self.is_close_to_grid():
@@ -51,7 +49,7 @@ class Player(Subject):
                 col_idx = proposed_rect.x // maze.cell_size
                 row_idx = proposed_rect.y // maze.cell_size
 
-                if maze.layout[row_idx][col_idx] != 3:
+                if maze.grid.code(col_idx, row_idx) != JAIL:
                     if not self.check_wall_collision(maze, proposed_rect):
                         self.current_direction = self.next_direction
                         self.next_direction = None
@@ -63,7 +61,7 @@ class Player(Subject):
                 col_idx = proposed_rect.x // maze.cell_size
                 row_idx = proposed_rect.y // maze.cell_size
 
-                if maze.layout[row_idx][col_idx] != 3:
+                if maze.grid.code(col_idx, row_idx) != JAIL:
                     if not self.check_wall_collision(maze, proposed_rect):
                         self.rect = proposed_rect
 
@@ -72,41 +70,44 @@ class Player(Subject):
     def collect_all_pellets(self, maze):
         """Collect all pellets instantly."""
         while maze.pellets:
-            pellet = maze.pellets.pop()
-            col_idx = (pellet[0] - maze.cell_size // 2) // maze.cell_size
-            row_idx = (pellet[1] - maze.cell_size // 2) // maze.cell_size
+            col_idx, row_idx, kind = maze.pellets.pop()
+            pellet = maze.pellets.position(col_idx, row_idx)
 
-            if maze.layout[row_idx][col_idx] == 2:  # Super-pellet
-                self.notify_observers("super_pellet_collected", {"player": self, "pellet_position": pellet})
+            if kind == SUPER_PELLET:
+                self.notify(SuperPelletCollected(self, pellet))
             else:
-                self.notify_observers("pellet_collected", {"player": self, "pellet_position": pellet})
+                self.notify(PelletCollected(self, pellet))
 
     def collides_with_ghost(self, ghosts):
         """
         Check if the player collides with any ghosts.
+        Pass the candidates from a SpatialHash query to avoid testing every ghost.
         """
         for ghost in ghosts:
             if self.rect.colliderect(ghost.rect):
                 # Notify observers about the collision
-                self.notify_observers("player_collided_with_ghost", {"player": self, "ghost": ghost})
+                self.notify(PlayerCollidedWithGhost(self, ghost))
                 return True  # Collision detected
         return False  # No collision with ghosts
 
 
 
     def collect_pellet(self, maze):
-        for pellet in maze.pellets:
-            if self.rect.collidepoint(pellet):
-                maze.pellets.remove(pellet)
-                col_idx = (pellet[0] - maze.cell_size // 2) // maze.cell_size
-                row_idx = (pellet[1] - maze.cell_size // 2) // maze.cell_size
-
-                if maze.layout[row_idx][col_idx] == 2:
-                    self.notify_observers("super_pellet_collected", {"player": self, "pellet_position": pellet})
-                    return SuperPlayerDecorator(self)
-
-                self.notify_observers("pellet_collected", {"player": self, "pellet_position": pellet})
-                return self
+        # Pellets sit at cell centres one cell apart, so the rect can only contain the centre
+        # of the first cell whose centre is at or past its top-left corner.
+        half = maze.cell_size // 2
+        col_idx = (self.rect.x - half + maze.cell_size - 1) // maze.cell_size
+        row_idx = (self.rect.y - half + maze.cell_size - 1) // maze.cell_size
+        pellet = maze.pellets.position(col_idx, row_idx)
+        if not self.rect.collidepoint(pellet):
+            return self
+
+        kind = maze.pellets.eat(col_idx, row_idx)
+        if kind == SUPER_PELLET:
+            self.notify(SuperPelletCollected(self, pellet))
+            return SuperPlayerDecorator(self, self.super_mode_duration)
+        elif kind:
+            self.notify(PelletCollected(self, pellet))
         return self
 
     def snap_to_grid(self, maze):
@@ -126,7 +127,4 @@ class Player(Subject):
 
     def check_wall_collision(self, maze, proposed_rect=None):
         rect_to_check = proposed_rect if proposed_rect else self.rect
-        for wall in maze.walls:
-            if rect_to_check.colliderect(wall):
-                return True
-        return False
+        return maze.collides_with_wall(rect_to_check)
@@ -0,0 +1,146 @@
+# SINGLETON PATTERN
+import json
+import time
+from array import array
+from collections import deque
+
+RECENT_SAMPLES = 1024  # Latest durations kept per phase for the overlay
+
+class FrameProfiler:
+    """
+    Records how long each phase of a frame takes into a fixed-size ring buffer.
+    Hooks chain timestamps:
+
+        t = profiler.begin()
+        ...collect pellets...
+        t = profiler.mark("pellets", t)
+
+    While disabled, begin() and mark() return at once, so the hooks can stay in the game loop.
+    """
+    _instance = None
+
+    @staticmethod
+    def getInstance():
+        if FrameProfiler._instance is None:
+            FrameProfiler()
+        return FrameProfiler._instance
+
+    def __init__(self, capacity=65536):
+        if FrameProfiler._instance is not None:
+            raise Exception("This class is a singleton!")
+        FrameProfiler._instance = self
+        self.enabled = False
+        self.show_overlay = False
+        self.capacity = capacity
+        self.starts = array("q", bytes(8 * capacity))  # perf_counter_ns at phase start
+        self.durations = array("q", bytes(8 * capacity))  # Nanoseconds
+        self.phase_ids = array("i", bytes(4 * capacity))
+        self.frames = array("q", bytes(8 * capacity))  # Frame each record belongs to
+        self.cursor = 0  # Next slot to write
+        self.count = 0  # Records written, capped at capacity
+        self.frame = 0
+        self.phase_names = []
+        self.phase_index = {}  # name -> id
+        self.recent = []  # Per phase id: deque of its latest durations, for the overlay
+        self.overlay_cache = None  # (surface, rect) list, refreshed every few frames
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def begin(self):
+        """Timestamp to start a phase from (0 while disabled)."""
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def mark(self, phase, start):
+        """
+        Record `phase` as running from `start` until now; returns now, the start of the next phase.
+        A start of 0 comes from begin() while the profiler was off, so that phase is not recorded.
+        """
+        if not self.enabled:
+            return 0
+        now = time.perf_counter_ns()
+        if not start:
+            return now  # Enabled part way through the phase
+        phase_id = self.phase_index.get(phase)
+        if phase_id is None:
+            phase_id = self.phase_index[phase] = len(self.phase_names)
+            self.phase_names.append(phase)
+            self.recent.append(deque(maxlen=RECENT_SAMPLES))
+
+        i = self.cursor
+        self.starts[i] = start
+        self.durations[i] = now - start
+        self.phase_ids[i] = phase_id
+        self.frames[i] = self.frame
+        self.recent[phase_id].append(now - start)
+        self.cursor = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+        return now
+
+    def end_frame(self):
+        self.frame += 1
+
+    def clear(self):
+        self.cursor = 0
+        self.count = 0
+        for recent in self.recent:
+            recent.clear()
+
+    def records(self):
+        """Buffered records as (phase, start_ns, duration_ns, frame), oldest first."""
+        first = self.cursor - self.count
+        for offset in range(self.count):
+            i = (first + offset) % self.capacity
+            yield self.phase_names[self.phase_ids[i]], self.starts[i], self.durations[i], self.frames[i]
+
+    def percentiles(self, points=(50, 99), recent=False):
+        """
+        {phase: {point: milliseconds}} over the records in the buffer, in first-seen phase order.
+        With `recent`, only over each phase's last RECENT_SAMPLES durations, which is cheap enough per frame.
+        """
+        if recent:
+            durations = {name: list(self.recent[phase_id]) for name, phase_id in self.phase_index.items()}
+        else:
+            durations = {name: [] for name in self.phase_names}
+            for phase, _, duration, _ in self.records():
+                durations[phase].append(duration)
+        stats = {}
+        for phase, values in durations.items():
+            if values:
+                values.sort()
+                stats[phase] = {point: values[min(len(values) - 1, len(values) * point // 100)] / 1e6
+                                for point in points}
+        return stats
+
+    def report(self):
+        """Plain-text p50/p99 table, one phase per line."""
+        return "\n".join(f"{phase:<16} p50 {stats[50]:7.3f} ms   p99 {stats[99]:7.3f} ms"
+                         for phase, stats in self.percentiles().items())
+
+    def overlay_sprites(self, font, color=(0, 255, 0), refresh_every=30):
+        """
+        The p50/p99 table of recent frames as (surface, rect) pairs for the top-right corner of
+        the screen. Re-rendered only every `refresh_every` frames, and from the per-phase recent
+        samples rather than the whole buffer, so the overlay does not skew what it measures.
+        """
+        if self.overlay_cache is None or self.frame % refresh_every == 0:
+            sprites = []
+            y = 50
+            for phase, stats in self.percentiles(recent=True).items():
+                surface = font.render(f"{phase} {stats[50]:.2f}/{stats[99]:.2f} ms", True, color)
+                sprites.append((surface, surface.get_rect(topright=(790, y))))
+                y += surface.get_height()
+            self.overlay_cache = sprites
+        return self.overlay_cache
+
+    def export_trace(self, filename):
+        """
+        Write the buffer in the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+        Phases are complete ("X") events on one thread, so per-ghost calls nest inside their phase.
+        """
+        events = [{"name": phase, "cat": "frame", "ph": "X", "ts": start / 1000, "dur": duration / 1000,
+                   "pid": 1, "tid": 1, "args": {"frame": frame}}
+                  for phase, start, duration, frame in self.records()]
+        with open(filename, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,222 @@
+import itertools
+import pygame
+from collections import OrderedDict
+from pellet_store import SUPER_PELLET
+from profiler import FrameProfiler
+
+class MazeLayers:
+    """
+    Pre-rendered maze surfaces. `background` holds the walls and is drawn once;
+    `level` is the background plus the pellets still in play and is only touched
+    when a pellet is eaten or the level is reset.
+    """
+    def __init__(self, maze, background_color=(0, 0, 0)):
+        self.maze = maze
+        self.background_color = background_color
+        size = maze.pixel_size()
+
+        self.background = pygame.Surface(size)
+        self.background.fill(background_color)
+        for wall in maze.merged_walls():
+            pygame.draw.rect(self.background, (0, 0, 255), wall)  # Blue walls
+
+        self.level = pygame.Surface(size)
+        self.pellet_generation = None
+        self.refresh_pellets()
+
+    def refresh_pellets(self):
+        """Redraw every remaining pellet onto a fresh copy of the background."""
+        pellets = self.maze.pellets
+        self.level.blit(self.background, (0, 0))
+        for col_idx, row_idx, kind in pellets.remaining():
+            self._draw_pellet(pellets.position(col_idx, row_idx), kind)
+        pellets.eaten.clear()
+        self.pellet_generation = pellets.generation
+
+    def apply_eaten_pellets(self):
+        """
+        Erase pellets eaten since the last call from the level surface.
+        Returns the screen rects that changed (all of it after a level reset).
+        """
+        pellets = self.maze.pellets
+        if pellets.generation != self.pellet_generation:
+            self.refresh_pellets()
+            return [self.level.get_rect()]
+
+        dirty = []
+        cell_size = self.maze.cell_size
+        for col_idx, row_idx in pellets.eaten:
+            cell = pygame.Rect(col_idx * cell_size, row_idx * cell_size, cell_size, cell_size)
+            self.level.blit(self.background, cell, cell)
+            dirty.append(cell)
+        pellets.eaten.clear()
+        return dirty
+
+    def _draw_pellet(self, position, kind):
+        if kind == SUPER_PELLET:
+            pygame.draw.circle(self.level, (255, 0, 0), position, 8)  # Red, larger pellet
+        else:
+            pygame.draw.circle(self.level, (255, 255, 0), position, 5)  # Yellow, smaller pellet
+
+
+class DirtyRectRenderer:
+    """
+    Draws the playing screen by restoring only the areas sprites left, redrawing the
+    sprites that touch them, and pushing just those rects to the display.
+    """
+    def __init__(self, maze):
+        self.layers = MazeLayers(maze)
+        self.previous = []  # (image, rect) drawn last frame, in draw order
+        self.full_redraw = True
+        self.profiler = FrameProfiler.getInstance()
+
+    def invalidate(self):
+        """Force a full redraw next frame, e.g. after a menu has covered the screen."""
+        self.full_redraw = True
+
+    def render(self, screen, sprites, hud=()):
+        """
+        Draw one frame. `sprites` and `hud` are lists of (image, rect) in draw order; the maze
+        fills the screen here, so HUD text and icons are treated like any other sprite and are
+        only redrawn when they change or get overdrawn.
+        """
+        t = self.profiler.begin()
+        sprites = [(image, pygame.Rect(rect.topleft, image.get_size()))
+                   for image, rect in itertools.chain(sprites, hud)]
+        dirty = self.layers.apply_eaten_pellets()
+
+        if self.full_redraw or len(sprites) != len(self.previous):
+            screen.fill(self.layers.background_color)
+            screen.blit(self.layers.level, (0, 0))
+            for image, rect in sprites:
+                screen.blit(image, rect)
+            t = self.profiler.mark("draw", t)
+            pygame.display.flip()
+            self.profiler.mark("flip", t)
+            self.previous = sprites
+            self.full_redraw = False
+            return
+
+        # Everything that moved or changed image leaves a hole at its old spot and needs its new spot drawn
+        for (image, rect), (old_image, old_rect) in zip(sprites, self.previous):
+            if image is not old_image or rect != old_rect:
+                dirty.append(old_rect)
+                dirty.append(rect)
+
+        # Sprites overlapping a dirty area are redrawn whole, so their rects join the dirty set too
+        redraw = [False] * len(sprites)
+        grew = bool(dirty)
+        while grew:
+            grew = False
+            for index, (image, rect) in enumerate(sprites):
+                if not redraw[index] and rect.collidelist(dirty) != -1:
+                    redraw[index] = True
+                    dirty.append(rect)
+                    grew = True
+
+        for rect in dirty:
+            screen.fill(self.layers.background_color, rect)
+            screen.blit(self.layers.level, rect, rect)
+        for index, (image, rect) in enumerate(sprites):
+            if redraw[index]:
+                screen.blit(image, rect)
+
+        t = self.profiler.mark("draw", t)
+        if dirty:
+            pygame.display.update(dirty)
+        self.profiler.mark("flip", t)
+        self.previous = sprites
+
+
+class ChunkedMazeLayers:
+    """
+    The maze pre-rendered in square chunks that are drawn the first time they come into view.
+    Only the most recently used chunks are kept, so memory and redraw work depend on the
+    screen size rather than the maze size.
+    """
+    def __init__(self, maze, chunk_cells=16, max_chunks=48, background_color=(0, 0, 0)):
+        self.maze = maze
+        self.background_color = background_color
+        self.chunk_size = chunk_cells * maze.cell_size  # Pixels
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> Surface, least recently used first
+        self.pellet_generation = maze.pellets.generation
+
+    def chunk(self, chunk_x, chunk_y):
+        key = (chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+
+        area = pygame.Rect(chunk_x * self.chunk_size, chunk_y * self.chunk_size, self.chunk_size, self.chunk_size)
+        surface = pygame.Surface(area.size)
+        surface.fill(self.background_color)
+        self.maze.draw(surface, area)
+        self.chunks[key] = surface
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def apply_eaten_pellets(self):
+        """Erase pellets eaten since the last call from the chunks that are cached."""
+        pellets = self.maze.pellets
+        if pellets.generation != self.pellet_generation:
+            self.chunks.clear()  # New level: every chunk is redrawn when next seen
+            self.pellet_generation = pellets.generation
+        else:
+            cell_size = self.maze.cell_size
+            cells_per_chunk = self.chunk_size // cell_size
+            for col_idx, row_idx in pellets.eaten:
+                surface = self.chunks.get((col_idx // cells_per_chunk, row_idx // cells_per_chunk))
+                if surface is not None:
+                    cell = pygame.Rect(col_idx % cells_per_chunk * cell_size, row_idx % cells_per_chunk * cell_size,
+                                       cell_size, cell_size)
+                    surface.fill(self.background_color, cell)
+        pellets.eaten.clear()
+
+    def visible(self, view):
+        """(surface, maze-pixel top-left) for every chunk overlapping the `view` rect."""
+        for chunk_y in range(max(view.top, 0) // self.chunk_size, (view.bottom - 1) // self.chunk_size + 1):
+            for chunk_x in range(max(view.left, 0) // self.chunk_size, (view.right - 1) // self.chunk_size + 1):
+                yield self.chunk(chunk_x, chunk_y), (chunk_x * self.chunk_size, chunk_y * self.chunk_size)
+
+
+class CameraRenderer:
+    """
+    Draws a maze larger than the screen through a scrolling Camera. The view moves most
+    frames, so the whole screen is redrawn, but only from the chunks and sprites in view.
+    """
+    def __init__(self, maze, camera):
+        self.layers = ChunkedMazeLayers(maze)
+        self.camera = camera
+        self.profiler = FrameProfiler.getInstance()
+        # The camera never looks past the maze edge, so chunks cover the whole screen unless the maze is smaller
+        width, height = maze.pixel_size()
+        self.fills_screen = width >= camera.rect.width and height >= camera.rect.height
+
+    def invalidate(self):
+        """Nothing is kept on screen between frames, so there is nothing to throw away."""
+
+    def render(self, screen, sprites, hud=()):
+        """
+        Draw one frame. `sprites` are (image, rect) in maze pixels and are culled to the view;
+        `hud` is (image, rect) in screen pixels, drawn on top.
+        """
+        t = self.profiler.begin()
+        self.layers.apply_eaten_pellets()
+        view = self.camera.rect
+
+        if not self.fills_screen:
+            screen.fill(self.layers.background_color)
+        for surface, (x, y) in self.layers.visible(view):
+            screen.blit(surface, (x - view.x, y - view.y))
+        for image, rect in sprites:
+            if view.colliderect(rect):
+                screen.blit(image, (rect.x - view.x, rect.y - view.y))
+        for image, rect in hud:
+            screen.blit(image, rect)
+
+        t = self.profiler.mark("draw", t)
+        pygame.display.flip()
+        self.profiler.mark("flip", t)
@@ -0,0 +1,34 @@
+import argparse
+import time
+from input_log import InputLog
+from simulation import GameSimulation
+
+def replay_headless(log):
+    """Re-run a recorded session with no display as fast as possible; returns the final GameSimulation."""
+    sim = GameSimulation(ghost_count=log.ghost_count, swarm=log.swarm, seed=log.seed)
+    for direction in log:
+        sim.step(direction)
+    return sim
+
+def replay_rendered(log, speed=1.0):
+    """Re-run a recorded session in the game window, at normal speed or fast-forwarded by `speed`."""
+    from game import GameEngine  # Only rendered replays need a display
+    GameEngine(replay=log, speed=speed).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a session recorded with game.py --record.")
+    parser.add_argument("recording")
+    parser.add_argument("--render", action="store_true", help="show the replay in the game window")
+    parser.add_argument("--speed", type=float, default=1.0, help="fast-forward multiplier for --render")
+    args = parser.parse_args()
+
+    log = InputLog.load(args.recording)
+    if args.render:
+        replay_rendered(log, args.speed)
+    else:
+        start = time.perf_counter()
+        sim = replay_headless(log)
+        elapsed = time.perf_counter() - start
+        print(f"{len(log)} ticks in {elapsed:.2f}s, final state {sim.state}, "
+              f"score {sim.score_manager.get_current_score()}, level {sim.event_manager.current_level}")
@@ -1,6 +1,6 @@
 # SINGLETON PATTERN
-import csv
-import os
+from score_storage import AppendLogScoreStorage, BackgroundScoreWriter
+from leaderboard import Leaderboard
 
 class ScoreManager:
     _instance = None
@@ -11,14 +11,18 @@ class ScoreManager:
             ScoreManager()
         return ScoreManager._instance
 
-    def __init__(self):
+    def __init__(self, storage=None):
         if ScoreManager._instance is not None:
             raise Exception("This class is a singleton!")
         ScoreManager._instance = self
         self.current_score = 0
-        self.high_scores = []
+        self.high_scores = []  # Top scores as (username, score), best first
         self.high_score_limit = 5
+        self.leaderboard = None
         self.filename = "./resources/scores.csv"
+        # Storage backend (append-only CSV log by default) and the thread that writes to it
+        self.storage = storage if storage else AppendLogScoreStorage(self.filename)
+        self.writer = BackgroundScoreWriter(self.storage)
         self.load_high_scores()
 
     def add_score(self, points):
@@ -30,43 +34,27 @@ class ScoreManager:
     def get_high_scores(self):
         return self.high_scores
 
+    def get_rank(self, username):
+        """1-based leaderboard rank of a user, or None if they have no recorded score."""
+        return self.leaderboard.rank(username)
+
     def load_high_scores(self):
-        if not os.path.exists(self.filename):
-            self.create_default_scores()
         try:
-            with open(self.filename, "r") as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip header
-                self.high_scores = [(row[0], int(row[1])) for row in reader][:self.high_score_limit]
+            # Records are streamed from the backend straight into the index
+            self.leaderboard = Leaderboard.from_records(self.storage.load(), self.high_score_limit)
         except Exception as e:
             print(f"Error loading high scores: {e}")
-            self.high_scores = []
-
-    def create_default_scores(self):
-        with open(self.filename, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Username", "Score"])
-
-    def sort_scores(self):
-        self.high_scores.sort(key=lambda x: x[1], reverse=True)
+            self.leaderboard = Leaderboard(self.high_score_limit)
+        self.high_scores = self.leaderboard.top_scores()
 
     def update_high_scores(self, username, score):
-        for i, (name, high_score) in enumerate(self.high_scores):
-            if name == username:
-                if score > high_score:
-                    self.high_scores[i] = (username, score)
-                break
-        else:
-            self.high_scores.append((username, score))
-        self.sort_scores()
-        self.high_scores = self.high_scores[:self.high_score_limit]
-        self.save_high_scores()
+        if self.leaderboard.submit(username, score):
+            self.high_scores = self.leaderboard.top_scores()
+        self.writer.submit(username, score)  # Written on the background thread
 
     def save_high_scores(self):
-        with open(self.filename, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Username", "Score"])
-            writer.writerows(self.high_scores)
+        """Rewrite the store with one best score per user, on the background thread."""
+        self.writer.request_compaction()
 
     def record_score(self, username, score):
         if not username or not isinstance(score, int) or score < 0:
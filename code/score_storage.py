@@ -0,0 +1,220 @@
+import atexit
+import csv
+import io
+import os
+import queue
+import sqlite3
+import threading
+
+try:
+    import fcntl  # Cross-process file locks (POSIX only)
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # Byte-range locks, used instead on Windows
+except ImportError:
+    msvcrt = None
+
+class ScoreStorage:
+    """Interface for high-score backends used by ScoreManager."""
+    def load(self):
+        """Yield every stored (username, score) record. Users may appear more than once."""
+        raise NotImplementedError("Storage backends must implement load()")
+
+    def append(self, username, score):
+        """Durably record one score."""
+        raise NotImplementedError("Storage backends must implement append()")
+
+    def compact(self):
+        """Shrink the store to one best score per user. Optional."""
+
+    def close(self):
+        """Release any resources. Optional."""
+
+
+class _FileLock:
+    """
+    Exclusive lock on a sidecar file, shared by every process using the same score file:
+    flock on POSIX, a lock on the file's first byte with msvcrt.locking on Windows.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, "a")
+        if fcntl:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        elif msvcrt:
+            self.file.seek(0)  # msvcrt locks bytes from the current position
+            while True:
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after about 10 seconds; keep waiting like flock
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        elif msvcrt:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+
+class AppendLogScoreStorage(ScoreStorage):
+    """
+    CSV file used as an append-only log: every score is one "Username,Score" line added
+    with a single write and fsync, so existing scores.csv files load unchanged and a crash
+    can at most leave a torn last line (which load() skips). Compaction keeps each user's
+    best score and swaps the file in atomically with os.replace.
+    """
+    def __init__(self, filename, compact_after=1000):
+        self.filename = filename
+        self.lock = _FileLock(filename + ".lock")
+        self.compact_after = compact_after  # Appends between automatic compactions
+        self.appends_since_compact = 0
+        if not os.path.exists(filename):
+            with self.lock:
+                if not os.path.exists(filename):
+                    self._write_atomically([])
+
+    def load(self):
+        try:
+            with open(self.filename, "r", newline="") as file:
+                reader = csv.reader(file)
+                next(reader, None)  # Skip header
+                for row in reader:
+                    try:
+                        yield row[0], int(row[1])
+                    except (IndexError, ValueError):
+                        continue  # Torn or malformed line
+        except FileNotFoundError:
+            return
+
+    def append(self, username, score):
+        line = _csv_line(username, score)
+        with self.lock:
+            with open(self.filename, "a+b") as file:
+                # Older files may not end with a newline; never glue a record onto the last line
+                if file.tell() > 0:
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) not in (b"\n", b"\r"):
+                        line = "\n" + line
+                file.write(line.encode("utf-8"))
+                file.flush()
+                os.fsync(file.fileno())
+        self.appends_since_compact += 1
+        if self.appends_since_compact >= self.compact_after:
+            self.compact()
+
+    def compact(self):
+        with self.lock:
+            best = {}
+            for username, score in self.load():
+                if score > best.get(username, -1):
+                    best[username] = score
+            self._write_atomically(sorted(best.items(), key=lambda x: x[1], reverse=True))
+        self.appends_since_compact = 0
+
+    def _write_atomically(self, rows):
+        temp_name = f"{self.filename}.{os.getpid()}.tmp"
+        with open(temp_name, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Username", "Score"])
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, self.filename)
+
+
+class SqliteScoreStorage(ScoreStorage):
+    """
+    Local SQLite database in WAL mode keeping each user's best score. SQLite handles
+    locking, so several game processes can record scores into the same file.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, timeout=10, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS scores (username TEXT PRIMARY KEY, score INTEGER NOT NULL)")
+        self.connection.commit()
+
+    def load(self):
+        # A separate connection, so reads never share a cursor with the writer thread
+        reader = sqlite3.connect(self.filename, timeout=10)
+        try:
+            yield from reader.execute("SELECT username, score FROM scores ORDER BY score DESC")
+        finally:
+            reader.close()
+
+    def append(self, username, score):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO scores (username, score) VALUES (?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET score = MAX(score, excluded.score)",
+                (username, score))
+
+    def compact(self):
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.connection.close()
+
+
+class BackgroundScoreWriter:
+    """
+    Runs storage writes on a worker thread so the game thread never waits on disk.
+    Pending writes are flushed when the interpreter exits.
+    """
+    _STOP = object()
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def submit(self, username, score):
+        """Queue a score to be appended."""
+        self.queue.put(("append", username, score))
+
+    def request_compaction(self):
+        self.queue.put(("compact",))
+
+    def flush(self):
+        """Block until every queued write has been handled (for tests and shutdown)."""
+        self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(self._STOP)
+            self.thread.join()
+            self.storage.close()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is self._STOP:
+                    return
+                if job[0] == "append":
+                    self.storage.append(job[1], job[2])
+                else:
+                    self.storage.compact()
+            except Exception as e:
+                print(f"Error saving high scores: {e}")
+            finally:
+                self.queue.task_done()
+
+
+def _csv_line(username, score):
+    """One CSV record, quoted the same way csv.writer would."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([username, score])
+    return buffer.getvalue()
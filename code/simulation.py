@@ -0,0 +1,242 @@
+# HEADLESS SIMULATION
+import argparse
+import random
+import time
+from player import Player
+from enemy import Enemy
+from maze import Maze
+from game_event_manager import GameEventManager
+from SuperPlayerDecorator import SuperPlayerDecorator
+from MovementStrategy import ChaseMovement
+from plan_scheduler import PLAN_BUDGET, get_plan_scheduler
+from ghost_swarm import GhostSwarm
+from spatial_hash import SpatialHash
+from rng import RngStreams
+from input_log import InputLog
+from profiler import FrameProfiler
+
+DIRECTIONS = ("left", "right", "up", "down")
+
+
+class SimulationScore:
+    """Per-game score counter used when no ScoreManager is attached (headless runs)."""
+    def __init__(self):
+        self.current_score = 0
+
+    def add_score(self, points):
+        self.current_score += points
+
+    def get_current_score(self):
+        return self.current_score
+
+
+class GameSimulation:
+    """
+    The game rules without a display, clock or drawing.
+    GameEngine builds on this class and adds rendering and the screen state machine.
+    """
+    def __init__(self, screen_width=800, screen_height=600, cell_size=25, score_manager=None,
+                 ghost_count=4, swarm=False, seed=None, tuning=None, layout=None, plan_thread=False):
+        # Every random decision in the rules draws from these seeded streams
+        self.rng = RngStreams(seed)
+        self.seed = self.rng.seed
+        self.map = Maze(screen_width, screen_height, cell_size, layout)
+        self.player = Player(cell_size, self.map)
+
+        # Ghost path searches are spread over ticks, PLAN_BUDGET per tick; the worker thread
+        # only changes where the queued ones run, not what the ghosts do
+        self.planner = get_plan_scheduler(self.map)
+        self.planner.budget = PLAN_BUDGET
+        if plan_thread:
+            self.planner.use_thread()
+
+        # The NumPy swarm backend advances all ghosts in one batched step (for stress runs)
+        self.swarm = GhostSwarm(self.map, seed=self.rng.derive_seed("swarm")) if swarm else None
+        if self.swarm:
+            self.ghosts = self.swarm.add_ghosts(ghost_count)
+        else:
+            self.ghosts = [Enemy(cell_size, self.map, strategy=ChaseMovement(), rng=self.rng)
+                           for _ in range(ghost_count)]
+        self.score_manager = score_manager if score_manager else SimulationScore()
+        self.event_manager = GameEventManager(self)
+
+        self.state = "playing"
+        self.frame_count = 0
+        self.input_log = InputLog(self.seed, ghost_count, swarm)  # Replays the session with the seed
+        self.profiler = FrameProfiler.getInstance()  # Per-phase timings, off unless enabled
+
+        # Place 2 ghosts in jail
+        for ghost in self.ghosts[2:4]:
+            ghost.remove(self.map)
+
+        # Balance overrides (speeds, timers) for batch runs
+        self.tuning = tuning if tuning else {}
+        self.apply_tuning()
+
+        # Broad phase for player-vs-ghost collisions, kept up to date as ghosts move
+        self.ghost_grid = SpatialHash(cell_size)
+        self.ghost_grid.rebuild(self.ghosts)
+
+        # Register observers
+        self.player.add_observer(self.event_manager)
+        for ghost in self.ghosts:
+            ghost.add_observer(self.event_manager)
+
+    def apply_tuning(self):
+        """
+        Apply balance overrides from `self.tuning`: "player_speed", "ghost_speed",
+        "direction_timer" and "super_mode_duration". Missing keys keep the defaults.
+        """
+        tuning = self.tuning
+        if "player_speed" in tuning:
+            self.player.speed = tuning["player_speed"]
+        if "super_mode_duration" in tuning:
+            self.player.super_mode_duration = tuning["super_mode_duration"]
+            self.event_manager.super_mode_duration = tuning["super_mode_duration"]
+        if "ghost_speed" in tuning and self.swarm:
+            self.swarm.speed = tuning["ghost_speed"]
+        for ghost in self.ghosts:
+            self._tune_ghost(ghost)
+
+    def _tune_ghost(self, ghost):
+        if "ghost_speed" in self.tuning:
+            ghost.speed = self.tuning["ghost_speed"]
+        if "direction_timer" in self.tuning:
+            ghost.direction_timer = self.tuning["direction_timer"]
+
+    def tick(self, direction=None):
+        """
+        Advance the simulation by one frame using an explicit input.
+        Returns True if the player collided with a ghost this tick.
+        """
+        profiler = self.profiler
+        t = profiler.begin()
+        self.frame_count += 1
+        self.input_log.record(direction)
+        self.player.set_direction(direction)
+
+        # Pellet collection
+        new_player = self.player.collect_pellet(self.map)
+        if isinstance(new_player, SuperPlayerDecorator):
+            self.player = new_player
+        t = profiler.mark("pellets", t)
+
+        # Update the player
+        updated_player = self.player.update(self.map, self.ghosts, self.ghost_grid)
+        if updated_player != self.player:
+            self.player = updated_player
+
+        # Update super mode timer
+        self.event_manager.update_super_mode()
+        t = profiler.mark("player", t)
+
+        if self.swarm:
+            self.swarm.update(self.player)
+            for index in self.swarm.moved_cells():
+                self.ghost_grid.move(self.ghosts[index])
+        else:
+            for ghost in self.ghosts:
+                ghost.update(self.map, self.player)
+                self.ghost_grid.move(ghost)
+        t = profiler.mark("ghosts", t)
+
+        # Searches over this tick's budget start now and are picked up on later ticks
+        self.planner.end_tick()
+        t = profiler.mark("planning", t)
+
+        collided = isinstance(self.player, Player) and \
+            self.player.collides_with_ghost(self.ghost_grid.query(self.player.rect))
+        t = profiler.mark("collision", t)
+
+        # Level completion, lost lives and game over take effect once, after the whole tick ran
+        self.event_manager.end_tick()
+        profiler.mark("events", t)
+        return collided
+
+    def step(self, direction=None):
+        """
+        Advance one tick and resolve transition states immediately, since there are no screens to show.
+        Returns the state after the tick.
+        """
+        if self.state != "playing":
+            return self.state
+
+        self.tick(direction)
+
+        if self.state == "life_lost":
+            self.state = "playing"
+        elif self.state == "level_complete":
+            self.add_new_ghost()
+            self.reset_level()
+        return self.state
+
+    def close(self):
+        """Stop the path planner's worker thread, if the game was started with one."""
+        self.planner.shutdown()
+
+    def add_new_ghost(self):
+        """Add a new ghost for the next level."""
+        if self.swarm:
+            new_ghost = self.swarm.add_ghosts(1)[0]
+        else:
+            new_ghost = Enemy(self.map.cell_size, self.map, strategy=ChaseMovement(), rng=self.rng)
+        self._tune_ghost(new_ghost)
+        new_ghost.add_observer(self.event_manager)
+        self.ghosts.append(new_ghost)
+        self.ghost_grid.insert(new_ghost)
+
+    def reset_level(self):
+        """Reset the level by regenerating pellets and resetting positions."""
+        self.map.reset_pellets()  # Reset pellets
+        self.player.rect.topleft = (self.map.cell_size, self.map.cell_size)  # Reset player position
+        for ghost in self.ghosts:
+            ghost.remove(self.map)  # Reset ghosts to jail
+            self.ghost_grid.move(ghost)
+        self.state = "playing"
+
+    def reset_player_and_ghosts(self):
+        self.player.rect.topleft = (self.map.cell_size, self.map.cell_size)  # Reset player position
+        for ghost in self.ghosts:
+            if not ghost.in_jail:
+                ghost.remove(self.map)
+                self.ghost_grid.move(ghost)
+                break
+
+
+def random_policy(seed=0, hold=15):
+    """Input policy that picks a random direction and holds it for `hold` ticks."""
+    rng = random.Random(seed)
+    direction = None
+
+    def policy(sim):
+        nonlocal direction
+        if sim.frame_count % hold == 0:
+            direction = rng.choice(DIRECTIONS)
+        return direction
+    return policy
+
+
+def measure_ticks_per_second(ticks=10000, policy=None, ghost_count=4, swarm=False):
+    """Run a headless game for `ticks` ticks (restarting after game over) and return ticks per second."""
+    policy = policy if policy else random_policy()
+    sim = GameSimulation(ghost_count=ghost_count, swarm=swarm)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if sim.state == "game_over":
+            sim = GameSimulation(ghost_count=ghost_count, swarm=swarm)
+        sim.step(policy(sim))
+    elapsed = time.perf_counter() - start
+    return ticks / elapsed if elapsed > 0 else float("inf")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the game headless and report simulation speed.")
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--ghosts", type=int, default=4)
+    parser.add_argument("--swarm", action="store_true", help="use the NumPy ghost swarm backend")
+    parser.add_argument("--profile", action="store_true", help="also print p50/p99 time per tick phase")
+    args = parser.parse_args()
+    FrameProfiler.getInstance().enable(args.profile)
+    print(f"{measure_ticks_per_second(args.ticks, ghost_count=args.ghosts, swarm=args.swarm):.0f} ticks/s")
+    if args.profile:
+        print(FrameProfiler.getInstance().report())
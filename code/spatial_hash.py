@@ -0,0 +1,60 @@
+class SpatialHash:
+    """
+    Broad-phase lookup of entities by the grid cell their centre is in.
+    Entities are re-bucketed as they move, so a query only looks at the few cells
+    around a rect instead of every entity. Buckets are insertion-ordered dicts to keep
+    candidate order deterministic.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = {}  # (col, row) -> {entity: None}
+        self.cells = {}  # entity -> (col, row)
+
+    def _cell_of(self, entity):
+        return (entity.rect.centerx // self.cell_size, entity.rect.centery // self.cell_size)
+
+    def insert(self, entity):
+        cell = self._cell_of(entity)
+        self.cells[entity] = cell
+        self.buckets.setdefault(cell, {})[entity] = None
+
+    def remove(self, entity):
+        cell = self.cells.pop(entity, None)
+        if cell is not None:
+            bucket = self.buckets[cell]
+            del bucket[entity]
+            if not bucket:
+                del self.buckets[cell]
+
+    def move(self, entity):
+        """Re-bucket an entity after it moved; cheap when it stayed in the same cell."""
+        cell = self._cell_of(entity)
+        if self.cells.get(entity) != cell:
+            self.remove(entity)
+            self.cells[entity] = cell
+            self.buckets.setdefault(cell, {})[entity] = None
+
+    def rebuild(self, entities):
+        """Drop everything and bucket `entities` again."""
+        self.buckets.clear()
+        self.cells.clear()
+        for entity in entities:
+            self.insert(entity)
+
+    def query(self, rect):
+        """
+        Return the entities that could overlap `rect`: those whose centre lies in a cell
+        within one cell of the cells the rect covers. Callers still do the exact test.
+        """
+        first_col = rect.left // self.cell_size - 1
+        last_col = (rect.right - 1) // self.cell_size + 1
+        first_row = rect.top // self.cell_size - 1
+        last_row = (rect.bottom - 1) // self.cell_size + 1
+
+        candidates = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                bucket = self.buckets.get((col, row))
+                if bucket:
+                    candidates.extend(bucket)
+        return candidates
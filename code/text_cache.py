@@ -0,0 +1,62 @@
+# SINGLETON PATTERN
+from collections import OrderedDict
+
+class TextCache:
+    """
+    Font registry plus a bounded LRU cache of rendered text surfaces keyed by
+    (font, text, colour), so unchanged labels are not rasterised again every frame.
+    """
+    _instance = None
+
+    @staticmethod
+    def getInstance():
+        if TextCache._instance is None:
+            TextCache()
+        return TextCache._instance
+
+    def __init__(self, max_surfaces=256):
+        if TextCache._instance is not None:
+            raise Exception("This class is a singleton!")
+        TextCache._instance = self
+        self.fonts = {}  # (font file, size) -> pygame.font.Font
+        self.surfaces = OrderedDict()  # (font, text, color) -> rendered surface, oldest first
+        self.max_surfaces = max_surfaces
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, size, name=None):
+        """Return the shared Font for a file (None for the default font) and size."""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            import pygame  # Only the windowed game draws text; headless imports skip pygame
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+    def render(self, font, text, color):
+        """Return the antialiased rendering of `text`, reusing it while it stays in the cache."""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)  # Evict the least recently used
+        return surface
+
+    def clear(self):
+        """Drop every font and rendered surface, e.g. before pygame.quit() invalidates them."""
+        self.fonts.clear()
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Cache counters, e.g. for a debug overlay or benchmarks."""
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.surfaces), "fonts": len(self.fonts)}